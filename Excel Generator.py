@@ -3,10 +3,26 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+import time
+import argparse
+
+from instrumentation import RunReport, profile_call
+from messy_tables import EXIT_BLOCK_SPECS, SheetIndex
+from workbooks import WorkbookReader
+from split_excel import fresh_output, typed_columns
+from exit_events import EVENT_SHEET, ExitEventStore, normalize_events
+from headcount_index import HeadcountIndex
+from rolling_metrics import rolling_entity_metrics
+from survival import event_survival, probation_cliff
+from department_taxonomy import EXIT_TYPE_DTYPE, unify_departments, unmapped_labels
+from forecast import (MODEL_ENTITIES, SIMULATION_MONTHS, parse_turnover_rates, entity_inputs,
+                      forecast_table, allocate, scenario_grid, simulate_bands)
 
 # --- CONFIGURATION ---
-BASE_DIR = r"C:\Users\ÍtaloMarquesMouzinho\.antigravity\PeopleMetrics"
+# PEOPLEMETRICS_DATA_DIR points the Generator at another data directory (e.g. synthetic_workbooks.py output)
+BASE_DIR = os.environ.get('PEOPLEMETRICS_DATA_DIR', r"C:\Users\ÍtaloMarquesMouzinho\.antigravity\PeopleMetrics")
 OUTPUT_FILE = os.path.join(BASE_DIR, 'Talent_Metrics_Model_2025.xlsx')
+REPORT_FILE = os.path.join(BASE_DIR, 'Talent_Metrics_Model_2025_run_report.json')
 
 # File names
 FILE_HC = os.path.join(BASE_DIR, 'Headcount Evolution 2022-2026.xlsx - Hoja 1.csv')
@@ -14,124 +30,239 @@ FILE_EXITS = os.path.join(BASE_DIR, '2025.xlsx - Internal exits.csv')
 FILE_TRAINING = os.path.join(BASE_DIR, '2025.xlsx - Training investment.csv')
 FILE_NPS = os.path.join(BASE_DIR, '2025.xlsx - NPS.csv')
 FILE_TURNOVER = os.path.join(BASE_DIR, '2025.xlsx - TurnoverRetention.csv')
+FILE_EXIT_EVENTS = os.path.join(BASE_DIR, f'2025.xlsx - {EVENT_SHEET}.csv') # optional, one row per leaver
+
+# Source workbooks, read directly when the split CSVs are missing
+WORKBOOK_HC = os.path.join(BASE_DIR, 'Headcount Evolution 2022-2026.xlsx')
+WORKBOOK_2025 = os.path.join(BASE_DIR, '2025.xlsx')
 
 # --- CONFIGURATION CONSTANTS For ESTIMATIONS ---
 AVG_REPLACEMENT_COST_EUR = 12000 # Estimated Cost per Hire + Onboarding drag
 AVG_OPS_LOST_VALUE_EUR = 8000 # Estimated lost productivity during vacancy
 
+# Hiring forecast: horizon, scenario grid, and the TurnoverRetention column behind each headcount entity
+FORECAST_MONTHS = 6
+SCENARIO_CHURN_FACTORS = [0.75, 1.0, 1.25, 1.5] # multiples of the observed turnover
+SCENARIO_MONTHLY_GROWTH = [0.0, 0.005, 0.01, 0.02]
+ENTITY_TURNOVER_COLUMNS = {e: col for e, (_, col) in MODEL_ENTITIES.items()}
+
 # --- PARSING HELPERS ---
-def parse_messy_table(df, start_keyword, end_condition_func, col_mapping=None):
-    """Finds and extracts a specific table from a messy CSV dump."""
-    start_idx = df[df.apply(lambda row: row.astype(str).str.contains(start_keyword, case=False, na=False).any(), axis=1)].index
-    if len(start_idx) == 0: 
-        return pd.DataFrame()
-    
-    header_row_idx = start_idx[0] + 1
-    if header_row_idx >= len(df): return pd.DataFrame()
+def split_output(csv_path, workbook_path, sheet_name):
+    """Path of the sheet's current split output next to csv_path, or None.
 
-    header_row = df.iloc[header_row_idx]
-    
-    data_rows = []
-    for i in range(header_row_idx + 1, len(df)):
-        row = df.iloc[i]
-        if end_condition_func(row): break
-        data_rows.append(row)
-        
-    extracted_df = pd.DataFrame(data_rows)
-    
-    if extracted_df.empty: return extracted_df
+    Typed Parquet/Feather outputs are preferred when the split manifest shows
+    they were written from the sheet's current data; otherwise the CSV.
+    """
+    return fresh_output(os.path.dirname(csv_path), workbook_path, sheet_name)
+
+def read_split_output(path, header=0):
+    """Reads a split sheet from its Parquet, Feather or CSV output.
 
-    if col_mapping and len(col_mapping) <= extracted_df.shape[1]:
-         extracted_df = extracted_df.iloc[:, :len(col_mapping)]
-         extracted_df.columns = col_mapping
+    Columnar outputs are written with the sheet's first row as column names;
+    with header=None that row is put back as data, as read_csv would return it.
+    """
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    elif path.endswith('.feather'):
+        df = pd.read_feather(path)
     else:
-        extracted_df.columns = header_row
-        
-    return extracted_df
+        return pd.read_csv(path, header=header)
+    if header is None:
+        df = pd.concat([pd.DataFrame([list(df.columns)], columns=df.columns).astype(object),
+                        df.astype(object)], ignore_index=True)
+        df.columns = range(df.shape[1])
+    return df
+
+def load_sheet(reader, csv_path, workbook_path, sheet_name, header=0):
+    """Reads the current split output (Parquet/Feather/CSV), or the sheet from its source workbook through the shared reader."""
+    path = split_output(csv_path, workbook_path, sheet_name)
+    if path is not None or not os.path.exists(workbook_path):
+        return read_split_output(path or csv_path, header=header)
+    return reader.read(workbook_path, sheet_name, header=header)
 
 def normalize_depts(df, col_name):
-    """Standardizes department names."""
+    """Standardizes department names via the shared department taxonomy."""
     if df.empty or col_name not in df.columns: return df
-    mapping = {
-        'CUSTOMER SERVICE': 'CS', 'IT - DEVELOPER': 'Tech/IT', 'IT - BACKOFFICE': 'Tech/IT',
-        'PROJECT/PRODUCT': 'Product', 'IT - UIUX': 'Tech/IT', 'IT - FRONT': 'Tech/IT',
-        'HR-CORPORATE': 'HR', 'PAID MARKETING': 'Marketing', 'ORGANIC MARKETING': 'Marketing',
-        'DBI': 'Data', 'IT ': 'Tech/IT', 'IT': 'Tech/IT',
-        'Project/ Product': 'Product', 'Project Product': 'Product',
-        'Finance, Legal and Payments': 'Finance/Legal', 'FINANCE, LEGAL AND PAYMENTS': 'Finance/Legal',
-        'Organic Marketing': 'Marketing', 'Paid Marketing': 'Marketing',
-        'RRHH': 'HR', 'ASO': 'Marketing', 'Market Research': 'Marketing',
-        'Ai Lab': 'Tech/IT'
-    }
-    # Case insensitive match helper could be added, but manual map for now
-    df['Unified_Dept'] = df[col_name].map(mapping).fillna(df[col_name])
+    unmapped = unmapped_labels(df[col_name])
+    if unmapped:
+        print(f"Warning: departments not in taxonomy (grouped as Other): {unmapped}")
+    df['Unified_Dept'] = unify_departments(df[col_name])
     return df
 
+# --- OUTPUT HELPERS ---
+def write_rows(workbook, sheet_name, df):
+    """Writes df to a new worksheet strictly row by row.
+
+    xlsxwriter's constant_memory mode flushes each row once the next one
+    starts, so cells must arrive in row order (DataFrame.to_excel writes
+    column by column). Header and date formats match to_excel's output.
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    header_fmt = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    date_fmts = {'date': workbook.add_format({'num_format': 'yyyy-mm-dd'}),
+                 'datetime': workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})}
+    worksheet.write_row(0, 0, [str(c) for c in df.columns], header_fmt)
+
+    columns, formats = [], []
+    for col in df.columns:
+        s = df[col]
+        kind = pd.api.types.infer_dtype(s, skipna=True)
+        if pd.api.types.is_datetime64_any_dtype(s.dtype):
+            values = [None if pd.isna(v) else v for v in s.dt.to_pydatetime()]
+            formats.append(date_fmts['datetime'])
+        else:
+            values = s.astype(object).where(s.notna(), None).tolist()
+            formats.append(date_fmts['date'] if kind == 'date' else None)
+        columns.append(values)
+    for row_idx, row in enumerate(zip(*columns), start=1):
+        for col_idx, value in enumerate(row):
+            if value is not None:
+                worksheet.write(row_idx, col_idx, value, formats[col_idx])
+    return worksheet
+
+def write_model(path, tabs, constant_memory=False, parquet_sidecar=False):
+    """Writes every tab to the model workbook and prints per-sheet write timings.
+
+    With constant_memory, rows are streamed to disk as they are written, so
+    memory stays flat for large data tabs. With parquet_sidecar, every tab is
+    also saved as '<workbook>_parquet/<tab>.parquet' for programmatic use.
+    """
+    timings = {}
+    engine_kwargs = {'options': {'constant_memory': True}} if constant_memory else {}
+    start = time.perf_counter()
+    with pd.ExcelWriter(path, engine='xlsxwriter', engine_kwargs=engine_kwargs) as writer:
+        for sheet_name, df in tabs.items():
+            sheet_start = time.perf_counter()
+            if constant_memory:
+                worksheet = write_rows(writer.book, sheet_name, df)
+            else:
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+                worksheet = writer.sheets[sheet_name]
+            # FORMATTING
+            worksheet.set_column(0, 5, 20)
+            timings[sheet_name] = (len(df), time.perf_counter() - sheet_start)
+        save_start = time.perf_counter()
+    timings['(save)'] = (None, time.perf_counter() - save_start)
+
+    if parquet_sidecar:
+        sidecar_dir = os.path.splitext(path)[0] + '_parquet'
+        os.makedirs(sidecar_dir, exist_ok=True)
+        for sheet_name, df in tabs.items():
+            sheet_start = time.perf_counter()
+            try:
+                typed_columns(df).to_parquet(os.path.join(sidecar_dir, f"{sheet_name}.parquet"), index=False)
+            except Exception as e:
+                print(f"  Parquet sidecar skipped for {sheet_name}: {e}")
+            rows, seconds = timings[sheet_name]
+            timings[sheet_name] = (rows, seconds + time.perf_counter() - sheet_start)
+
+    mode = 'constant_memory' if constant_memory else 'buffered'
+    print(f"Sheet write timings ({mode}{', + parquet' if parquet_sidecar else ''}):")
+    for sheet_name, (rows, seconds) in timings.items():
+        print(f"  {sheet_name:<26} {'' if rows is None else rows:>8} {seconds:>8.3f}s")
+    print(f"  {'total':<26} {'':>8} {time.perf_counter() - start:>8.3f}s")
+
 # --- MAIN PROCESSING ---
-def generate_model():
+def generate_model(constant_memory=False, parquet_sidecar=False, trace_memory=False):
+    """Builds the model workbook; every stage's time and rows go to the run report.
+
+    trace_memory adds tracemalloc peak memory per stage, at a large cost in run time.
+    """
+    report = RunReport('Excel Generator', trace_memory=trace_memory)
     print("Loading data...")
+    reader = WorkbookReader()
     
     # ---------------------------
     # 1. LOAD BASE DATASETS
     # ---------------------------
     
     # HEADCOUNT
-    try:
-        df_hc = pd.read_csv(FILE_HC)
-        if 'Fecha' in df_hc.columns:
-             df_hc['Fecha'] = pd.to_datetime(df_hc['Fecha'])
-             df_hc = df_hc.sort_values('Fecha')
-             cols_to_keep = ['Fecha']
-             for c in ['Leadtech', 'Randstad', 'Deel', 'Freelance']:
-                 if c in df_hc.columns: cols_to_keep.append(c)
-                 else: df_hc[c] = 0
-             df_hc = df_hc[cols_to_keep].fillna(0)
-             df_hc['Total_Workforce'] = df_hc['Leadtech'] + df_hc['Randstad'] + df_hc['Deel'] + df_hc['Freelance']
-        else:
-            df_hc = pd.DataFrame()
-            print("Warning: HC file missing Fecha")
-    except: df_hc = pd.DataFrame()
+    with report.stage('load_headcount') as stage:
+        try:
+            df_hc = load_sheet(reader, FILE_HC, WORKBOOK_HC, 'Hoja 1')
+            if 'Fecha' in df_hc.columns:
+                 df_hc['Fecha'] = pd.to_datetime(df_hc['Fecha'])
+                 df_hc = df_hc.sort_values('Fecha')
+                 cols_to_keep = ['Fecha']
+                 for c in ['Leadtech', 'Randstad', 'Deel', 'Freelance']:
+                     if c in df_hc.columns: cols_to_keep.append(c)
+                     else: df_hc[c] = 0
+                 df_hc = df_hc[cols_to_keep].fillna(0)
+                 df_hc['Total_Workforce'] = df_hc['Leadtech'] + df_hc['Randstad'] + df_hc['Deel'] + df_hc['Freelance']
+            else:
+                df_hc = pd.DataFrame()
+                print("Warning: HC file missing Fecha")
+        except: df_hc = pd.DataFrame()
+        stage['rows'] = len(df_hc)
 
     # EXITS (Detailed)
-    try:
-        df_exits_raw = pd.read_csv(FILE_EXITS, header=None)
-        
-        # Voluntary
-        df_vol = parse_messy_table(df_exits_raw, "Voluntary exit per Department", 
-                                  lambda r: pd.isna(r[0]) or str(r[0]).lower() == 'total',
-                                  ['Department', 'Count'])
-        df_vol['Type'] = 'Voluntary'
+    with report.stage('load_exits') as stage:
+        try:
+            df_exits_raw = load_sheet(reader, FILE_EXITS, WORKBOOK_2025, 'Internal exits', header=None)
         
-        # Dismissals
-        df_dis = parse_messy_table(df_exits_raw, "Disciplinary dismissal", 
-                                  lambda r: pd.isna(r[0]) or str(r[0]).lower() == 'total',
-                                  ['Department', 'Count'])
-        df_dis['Type'] = 'Dismissal'
+            # Voluntary, Dismissals and Tenure/Timing located in a single pass
+            exit_tables = SheetIndex(df_exits_raw).extract_many({
+                **EXIT_BLOCK_SPECS,
+                # Exit timing, Voluntary exits, Avg tenure (months)
+                'Tenure': {'keyword': "Exit timing", 'stop_at_total': False,
+                           'col_mapping': ['Timing_Category', 'Count', 'Avg_Tenure_Months']},
+            })
+            df_vol = exit_tables['Voluntary']
+            df_vol['Type'] = 'Voluntary'
+            df_dis = exit_tables['Dismissal']
+            df_dis['Type'] = 'Dismissal'
         
-        df_exits = pd.concat([df_vol, df_dis])
-        df_exits['Count'] = pd.to_numeric(df_exits['Count'], errors='coerce').fillna(0)
-        df_exits = normalize_depts(df_exits, 'Department')
+            df_exits = pd.concat([df_vol, df_dis])
+            df_exits['Count'] = pd.to_numeric(df_exits['Count'], errors='coerce').fillna(0)
+            df_exits['Type'] = df_exits['Type'].astype(EXIT_TYPE_DTYPE)
+            df_exits = normalize_depts(df_exits, 'Department')
         
-        # Tenure/Timing Table
-        # Exit timing, Voluntary exits, Avg tenure (months)
-        df_tenure = parse_messy_table(df_exits_raw, "Exit timing",
-                                      lambda r: pd.isna(r[0]),
-                                      ['Timing_Category', 'Count', 'Avg_Tenure_Months'])
-        df_tenure['Count'] = pd.to_numeric(df_tenure['Count'], errors='coerce').fillna(0)
-    except Exception as e:
-        print(f"Error exits: {e}")
-        df_exits = pd.DataFrame()
-        df_tenure = pd.DataFrame()
+            df_tenure = exit_tables['Tenure']
+            df_tenure['Count'] = pd.to_numeric(df_tenure['Count'], errors='coerce').fillna(0)
+        except Exception as e:
+            print(f"Error exits: {e}")
+            df_exits = pd.DataFrame()
+            df_tenure = pd.DataFrame()
+        stage['rows'] = len(df_exits)
 
     # TRAINING
-    try:
-        df_train_raw = pd.read_csv(FILE_TRAINING, header=None)
-        df_train = parse_messy_table(df_train_raw, "Training investment by department", 
-                                    lambda r: pd.isna(r[0]) or str(r[0]).lower() == 'total',
-                                    ['Department', 'Investment_EUR', 'Hours'])
-        df_train['Investment_EUR'] = pd.to_numeric(df_train['Investment_EUR'], errors='coerce').fillna(0)
-        df_train = normalize_depts(df_train, 'Department')
-    except: df_train = pd.DataFrame()
+    with report.stage('load_training') as stage:
+        try:
+            df_train_raw = load_sheet(reader, FILE_TRAINING, WORKBOOK_2025, 'Training investment', header=None)
+            df_train = SheetIndex(df_train_raw).extract(
+                "Training investment by department", col_mapping=['Department', 'Investment_EUR', 'Hours'])
+            df_train['Investment_EUR'] = pd.to_numeric(df_train['Investment_EUR'], errors='coerce').fillna(0)
+            df_train = normalize_depts(df_train, 'Department')
+        except: df_train = pd.DataFrame()
+        stage['rows'] = len(df_train)
+
+    # TURNOVER (annual rate per entity)
+    with report.stage('load_turnover') as stage:
+        try:
+            df_turnover_raw = load_sheet(reader, FILE_TURNOVER, WORKBOOK_2025, 'TurnoverRetention', header=None)
+            turnover_rates = parse_turnover_rates(df_turnover_raw)
+        except Exception as e:
+            print(f"Error turnover: {e}")
+            turnover_rates = pd.Series(dtype=float)
+        stage['rows'] = len(turnover_rates)
+    # EXIT EVENTS (optional per-leaver records; when present they replace the aggregated exit blocks)
+    with report.stage('load_exit_events') as stage:
+        df_events = pd.DataFrame()
+        store = None
+        try:
+            if split_output(FILE_EXIT_EVENTS, WORKBOOK_2025, EVENT_SHEET) is not None or (os.path.exists(WORKBOOK_2025)
+                                                       and EVENT_SHEET in reader.sheet_names(WORKBOOK_2025)):
+                df_events = normalize_events(load_sheet(reader, FILE_EXIT_EVENTS, WORKBOOK_2025, EVENT_SHEET))
+        except Exception as e:
+            print(f"Error exit events: {e}")
+        if not df_events.empty:
+            store = ExitEventStore(df_events)
+            df_exits = store.exits_by_type().rename(columns={'Dept_Unified': 'Unified_Dept'})
+            first, last = pd.Timestamp(store.dates[0]), pd.Timestamp(store.dates[-1])
+            print(f"Using {len(store)} exit events ({first:%Y-%m-%d} to {last:%Y-%m-%d}) "
+                  "instead of the aggregated exit blocks")
+        stage['rows'] = len(df_events)
+    reader.close()
 
     # NPS
     try:
@@ -150,141 +281,230 @@ def generate_model():
     # A. DB_Retention_Tenure
     # View: Early (Probation) vs Late (Post-Probation) Churn
     # Logic: Use df_tenure
-    if not df_tenure.empty:
-        df_retention_view = df_tenure.copy()
-        df_retention_view['Risk_Label'] = np.where(df_retention_view['Timing_Category'].str.contains('probation', case=False), 'Early Churn (Hiring Miss)', 'Regrettable Loss')
-    else:
-        df_retention_view = pd.DataFrame({'Info': ['No detailed tenure data available']})
+    with report.stage('DB_Retention_Tenure') as stage:
+        if not df_tenure.empty:
+            df_retention_view = df_tenure.copy()
+            df_retention_view['Risk_Label'] = np.where(df_retention_view['Timing_Category'].str.contains('probation', case=False), 'Early Churn (Hiring Miss)', 'Regrettable Loss')
+        else:
+            df_retention_view = pd.DataFrame({'Info': ['No detailed tenure data available']})
+        stage['rows'] = len(df_retention_view)
 
     # B. DB_Dept_Health
     # View: Combined Risk of Dismissals + Voluntary Exits
     # Logic: Pivot Exits
-    if not df_exits.empty:
-        df_health = df_exits.groupby(['Unified_Dept', 'Type'])['Count'].sum().unstack(fill_value=0).reset_index()
-        # Add Investment if available
-        if not df_train.empty:
-            df_inv = df_train.groupby('Unified_Dept')['Investment_EUR'].sum().reset_index()
-            df_health = pd.merge(df_health, df_inv, on='Unified_Dept', how='left').fillna(0)
+    with report.stage('DB_Dept_Health') as stage:
+        if not df_exits.empty:
+            df_health = df_exits.groupby(['Unified_Dept', 'Type'], observed=True)['Count'].sum().unstack(fill_value=0)
+            df_health.columns = df_health.columns.astype(str)
+            df_health = df_health.reset_index()
+            # Add Investment if available
+            if not df_train.empty:
+                df_inv = df_train.groupby('Unified_Dept', observed=True)['Investment_EUR'].sum().reset_index()
+                df_health = pd.merge(df_health, df_inv, on='Unified_Dept', how='left').fillna(0)
         
-        df_health['Total_Exits'] = df_health.get('Dismissal', 0) + df_health.get('Voluntary', 0)
-        df_health['Health_Status'] = np.where(df_health['Total_Exits'] > 5, 'High Risk', 'Stable')
-    else:
-        df_health = pd.DataFrame()
+            df_health['Total_Exits'] = df_health.get('Dismissal', 0) + df_health.get('Voluntary', 0)
+            df_health['Health_Status'] = np.where(df_health['Total_Exits'] > 5, 'High Risk', 'Stable')
+        else:
+            df_health = pd.DataFrame()
+        stage['rows'] = len(df_health)
 
     # C. DB_Cost_of_Churn
     # View: Financial Impact
     # Logic: (Exits * Replacement Cost) + (Exits * Training Lost) approx
-    if not df_health.empty:
-        df_cost = df_health.copy()
-        df_cost['Replacement_Cost'] = df_cost['Total_Exits'] * AVG_REPLACEMENT_COST_EUR
-        df_cost['Productivity_Loss'] = df_cost['Total_Exits'] * AVG_OPS_LOST_VALUE_EUR
-        # Sunk training (Assuming 50% of training investment is lost when people leave - simplified proxy)
-        # Better: Training Investment per Head * Exits? No head count. 
-        # Using Total Dept Investment * (Exits / Total Dept Exits Ratio? No). 
-        # Let's just assume we lose the specific investment. Since we don't have inv per person, 
-        # we will list Total Dept Investment as Context, and rely on Replacement Cost as the main Churn Cost.
+    with report.stage('DB_Cost_of_Churn') as stage:
+        if not df_health.empty:
+            df_cost = df_health.copy()
+            df_cost['Replacement_Cost'] = df_cost['Total_Exits'] * AVG_REPLACEMENT_COST_EUR
+            df_cost['Productivity_Loss'] = df_cost['Total_Exits'] * AVG_OPS_LOST_VALUE_EUR
+            # Sunk training (Assuming 50% of training investment is lost when people leave - simplified proxy)
+            # Better: Training Investment per Head * Exits? No head count. 
+            # Using Total Dept Investment * (Exits / Total Dept Exits Ratio? No). 
+            # Let's just assume we lose the specific investment. Since we don't have inv per person, 
+            # we will list Total Dept Investment as Context, and rely on Replacement Cost as the main Churn Cost.
         
-        df_cost['Total_Estimated_Loss'] = df_cost['Replacement_Cost'] + df_cost['Productivity_Loss']
+            df_cost['Total_Estimated_Loss'] = df_cost['Replacement_Cost'] + df_cost['Productivity_Loss']
         
-        # Summary Row
-        total_row = pd.DataFrame({
-            'Unified_Dept': ['TOTAL'],
-            'Replacement_Cost': [df_cost['Replacement_Cost'].sum()],
-            'Productivity_Loss': [df_cost['Productivity_Loss'].sum()],
-            'Total_Estimated_Loss': [df_cost['Total_Estimated_Loss'].sum()]
-        })
-        df_cost = pd.concat([df_cost, total_row], ignore_index=True)
-    else:
-        df_cost = pd.DataFrame()
+            # Summary Row
+            total_row = pd.DataFrame({
+                'Unified_Dept': ['TOTAL'],
+                'Replacement_Cost': [df_cost['Replacement_Cost'].sum()],
+                'Productivity_Loss': [df_cost['Productivity_Loss'].sum()],
+                'Total_Estimated_Loss': [df_cost['Total_Estimated_Loss'].sum()]
+            })
+            df_cost = pd.concat([df_cost, total_row], ignore_index=True)
+        else:
+            df_cost = pd.DataFrame()
+        stage['rows'] = len(df_cost)
 
     # D. DB_Workforce_Mix
     # View: % Split of Internal vs External Over Time
     # Logic: Use df_hc
-    if not df_hc.empty:
-        df_mix = df_hc.copy()
-        # Calculate percentages
-        df_mix['Share_Internal'] = df_mix['Leadtech'] / df_mix['Total_Workforce']
-        df_mix['Share_External'] = (df_mix['Randstad'] + df_mix['Deel'] + df_mix['Freelance']) / df_mix['Total_Workforce']
-        
-        df_mix_view = df_mix[['Fecha', 'Total_Workforce', 'Leadtech', 'Share_Internal', 
-                              'Randstad', 'Deel', 'Share_External']].tail(24) # Last 2 years
-    else:
-        df_mix_view = pd.DataFrame()
-
-    # E. DB_Hiring_Forecast
-    # View: Predicted needs
-    # Logic: Avg Churn Rate last 6 months -> Apply to current HC -> + Grow Target
-    if not df_hc.empty:
-        # 1. Calculate Monthly Churn (Approx from headcounts drops? No, specific exits are better but we don't have date-based exits)
-        # We'll use the 'Turnover Rate' from the summary file for a global multiplier?
-        # Or derive: Net Change = Hires - Exits. Exits are unknown per month.
-        # Let's use a flat assumption based on the "17% turnover" from the CSV text analysis
-        monthly_churn_rate = 0.17 / 12 # ~1.4% per month
-        
-        latest_hc = df_hc.iloc[-1]['Total_Workforce']
-        latest_date = df_hc.iloc[-1]['Fecha']
+    with report.stage('DB_Workforce_Mix') as stage:
+        if not df_hc.empty:
+            df_mix = df_hc.copy()
+            # Calculate percentages
+            df_mix['Share_Internal'] = df_mix['Leadtech'] / df_mix['Total_Workforce']
+            df_mix['Share_External'] = (df_mix['Randstad'] + df_mix['Deel'] + df_mix['Freelance']) / df_mix['Total_Workforce']
         
-        forecast_months = []
-        current_hc = latest_hc
-        
-        for i in range(1, 7): # 6 Month Forecast
-            next_date = latest_date + pd.DateOffset(months=i)
-            # Predicted Exits
-            pred_exits = int(current_hc * monthly_churn_rate)
-            # Growth Target (Assume 1% net count growth per month)
-            target_net_growth = int(current_hc * 0.01)
-            
-            # Hiring Needed = Exits + Net Growth
-            hiring_needed = pred_exits + target_net_growth
-            
-            # Update HC
-            current_hc = current_hc + target_net_growth
-            
-            forecast_months.append({
-                'Month': next_date.date(),
-                'Projected_Opening_HC': int(current_hc - target_net_growth),
-                'Predicted_Attrition': pred_exits,
-                'Net_Growth_Target': target_net_growth,
-                'Recruitment_Target': hiring_needed
-            })
-            
-        df_forecast = pd.DataFrame(forecast_months)
-    else:
-        df_forecast = pd.DataFrame()
+            df_mix_view = df_mix[['Fecha', 'Total_Workforce', 'Leadtech', 'Share_Internal', 
+                                  'Randstad', 'Deel', 'Share_External']].tail(24) # Last 2 years
+        else:
+            df_mix_view = pd.DataFrame()
+        stage['rows'] = len(df_mix_view)
+
+    # E. DB_Hiring_Forecast / DB_Forecast_Scenarios
+    # View: Predicted needs per entity and department, plus a churn x growth scenario grid
+    # Logic: Latest HC per entity -> monthly churn from TurnoverRetention, growth from the
+    # trailing 12 months of total headcount -> projected in one array computation
+    with report.stage('DB_Hiring_Forecast') as stage:
+        if not df_hc.empty:
+            latest = df_hc.iloc[-1]
+            opening, churn, growth = entity_inputs(df_hc, turnover_rates)
+
+            df_forecast = forecast_table(opening, churn, growth, FORECAST_MONTHS, latest['Fecha'])
+            df_forecast.insert(0, 'Level', 'Entity')
+            # Internal (Leadtech) needs split across departments by their share of exits
+            if not df_exits.empty:
+                dept_shares = df_exits.groupby('Unified_Dept', observed=True)['Count'].sum()
+                df_dept = allocate(df_forecast[df_forecast['Entity'] == 'Leadtech'], dept_shares)
+                df_dept.insert(0, 'Level', 'Department')
+                df_forecast = pd.concat([df_forecast, df_dept], ignore_index=True)
+
+            df_scenarios = scenario_grid(opening.to_numpy(), churn.to_numpy(), SCENARIO_CHURN_FACTORS,
+                                         SCENARIO_MONTHLY_GROWTH, FORECAST_MONTHS)
+        else:
+            df_forecast = pd.DataFrame()
+            df_scenarios = pd.DataFrame()
+        stage['rows'] = len(df_forecast) + len(df_scenarios)
+
+    # F. DB_Attrition_Simulation
+    # View: P10/P50/P90 bands of monthly exits and cumulative recruitment need
+    # Logic: Seeded binomial draw of exits for all paths x entities x months at once
+    # (the same simulate_bands entry point as the dashboard)
+    with report.stage('DB_Attrition_Simulation') as stage:
+        df_simulation = simulate_bands(df_hc, turnover_rates, SIMULATION_MONTHS)
+        stage['rows'] = len(df_simulation)
+
+    # G. DB_Turnover_vs_AvgHC
+    # View: Time-weighted average headcount per entity and month, plus exits and
+    # rate vs average headcount when per-leaver exit events are available
+    # Logic: Cumulative trapezoid index over df_hc -> every month's average in one query;
+    # exits per month and entity from the event store's date index
+    with report.stage('DB_Turnover_vs_AvgHC') as stage:
+        if not df_hc.empty:
+            hc_columns = list(ENTITY_TURNOVER_COLUMNS) + ['Total_Workforce']
+            hc_index = HeadcountIndex(df_hc, columns=hc_columns)
+            avg_hc = hc_index.period_averages('M')
+            months = avg_hc.index
+            df_turnover_hc = avg_hc.add_prefix('Avg_HC_')
+            if store is not None:
+                counts = store.window_counts(months.start_time, months.end_time).sum(axis=(2, 3))
+                by_entity = pd.DataFrame(counts, index=months, columns=store.entities)
+                exits = by_entity.reindex(columns=list(ENTITY_TURNOVER_COLUMNS), fill_value=0)
+                # Total_Workforce headcount only covers these entities, so its exits must too
+                exits['Total_Workforce'] = exits.sum(axis=1)
+                rates = exits / avg_hc.where(avg_hc > 0)
+                df_turnover_hc = pd.concat([df_turnover_hc, exits.add_prefix('Exits_'),
+                                            rates.add_prefix('Rate_')], axis=1)
+            df_turnover_hc = df_turnover_hc.round(4).reset_index(drop=True)
+            df_turnover_hc.insert(0, 'Month', months.strftime('%Y-%m'))
+        else:
+            df_turnover_hc = pd.DataFrame()
+        stage['rows'] = len(df_turnover_hc)
+
+    # H. DB_Rolling_Metrics
+    # View: Trailing 3/6/12-month net change (and turnover / retention with exit events) per entity
+    # Logic: Window edges for all months as arrays -> headcount index queries + cumulative exit sums
+    with report.stage('DB_Rolling_Metrics') as stage:
+        if not df_hc.empty:
+            df_rolling = rolling_entity_metrics(hc_index, {e: [e] for e in ENTITY_TURNOVER_COLUMNS}, store)
+            df_rolling['Month'] = df_rolling['Month'].dt.strftime('%Y-%m')
+            df_rolling = df_rolling.round(4)
+        else:
+            df_rolling = pd.DataFrame()
+        stage['rows'] = len(df_rolling)
+
+    # I. DB_Tenure_Survival / DB_Probation_Cliff
+    # View: Kaplan-Meier tenure-at-exit curves per entity and department, and the share of
+    # leavers lost during probation (only with per-leaver exit events)
+    # Logic: All groups binned by (group, tenure month) and estimated in one batched pass
+    with report.stage('DB_Tenure_Survival') as stage:
+        if store is not None:
+            by_entity = event_survival(store, 'Entity')
+            by_dept = event_survival(store, 'Department')
+            by_dept = by_dept[by_dept['Group'] != 'All']
+            df_survival = pd.concat([by_entity.assign(Level='Entity'), by_dept.assign(Level='Department')],
+                                    ignore_index=True)
+            df_survival = df_survival[['Level'] + list(by_entity.columns)].round(4)
+            df_cliff = pd.concat([probation_cliff(by_entity).assign(Level='Entity'),
+                                  probation_cliff(by_dept).assign(Level='Department')], ignore_index=True)
+            df_cliff = df_cliff[['Level'] + [c for c in df_cliff.columns if c != 'Level']].round(4)
+        else:
+            df_survival = pd.DataFrame()
+            df_cliff = pd.DataFrame()
+        stage['rows'] = len(df_survival) + len(df_cliff)
 
     # ---------------------------
     # 3. WRITE OUTPUT
     # ---------------------------
-    print(f"Writing to {OUTPUT_FILE}...")
-    try:
-        with pd.ExcelWriter(OUTPUT_FILE, engine='xlsxwriter') as writer:
-            
-            # ORIGINAL DATA TABS
-            if not df_hc.empty: df_hc.to_excel(writer, sheet_name='Data_Headcount', index=False)
-            if not df_exits.empty: df_exits.to_excel(writer, sheet_name='Data_Exits_Detailed', index=False)
-            if not df_train.empty: df_train.to_excel(writer, sheet_name='Data_Training', index=False)
-            if not df_nps_clean.empty: df_nps_clean.to_excel(writer, sheet_name='Data_NPS', index=False)
-            
-            # NEW INSIGHT TABS
-            if not df_retention_view.empty:
-                df_retention_view.to_excel(writer, sheet_name='DB_Retention_Tenure', index=False)
-            if not df_health.empty:
-                df_health.to_excel(writer, sheet_name='DB_Dept_Health', index=False)
-            if not df_cost.empty:
-                df_cost.to_excel(writer, sheet_name='DB_Cost_of_Churn', index=False)
-            if not df_mix_view.empty:
-                df_mix_view.to_excel(writer, sheet_name='DB_Workforce_Mix', index=False)
-            if not df_forecast.empty:
-                df_forecast.to_excel(writer, sheet_name='DB_Hiring_Forecast', index=False)
+    tabs = {
+        # ORIGINAL DATA TABS
+        'Data_Headcount': df_hc,
+        'Data_Exits_Detailed': df_exits,
+        'Data_Exit_Events': df_events,
+        'Data_Training': df_train,
+        'Data_NPS': df_nps_clean,
+        # NEW INSIGHT TABS
+        'DB_Retention_Tenure': df_retention_view,
+        'DB_Dept_Health': df_health,
+        'DB_Cost_of_Churn': df_cost,
+        'DB_Workforce_Mix': df_mix_view,
+        'DB_Hiring_Forecast': df_forecast,
+        'DB_Forecast_Scenarios': df_scenarios,
+        'DB_Attrition_Simulation': df_simulation,
+        'DB_Turnover_vs_AvgHC': df_turnover_hc,
+        'DB_Rolling_Metrics': df_rolling,
+        'DB_Tenure_Survival': df_survival,
+        'DB_Probation_Cliff': df_cliff,
+    }
+    tabs = {name: df for name, df in tabs.items() if not df.empty}
 
-            # FORMATTING
-            workbook = writer.book
-            for sheet in writer.sheets.values():
-                sheet.set_column(0, 5, 20)
+    print(f"Writing to {OUTPUT_FILE}...")
+    with report.stage('write', rows=sum(len(df) for df in tabs.values())):
+        try:
+            write_model(OUTPUT_FILE, tabs, constant_memory=constant_memory, parquet_sidecar=parquet_sidecar)
+            print("Done! File generated.")
+        except Exception as e:
+            print(f"Error writing output file: {e}")
 
-        print("Done! File generated.")
+    # ---------------------------
+    # 4. RUN REPORT
+    # ---------------------------
+    report.metadata = {'output_file': OUTPUT_FILE, 'constant_memory': constant_memory,
+                       'parquet_sidecar': parquet_sidecar}
+    report.finish()
+    report.print_summary()
+    try:
+        report.write(REPORT_FILE)
+        print(f"Run report saved to {REPORT_FILE}")
     except Exception as e:
-        print(f"Error writing output file: {e}")
+        print(f"Error writing run report: {e}")
+    return report
 
 if __name__ == "__main__":
-    generate_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build Talent_Metrics_Model_2025.xlsx from the HR exports.")
+    parser.add_argument('--constant-memory', action='store_true',
+                        help="Stream rows to disk (xlsxwriter constant_memory) instead of buffering every sheet")
+    parser.add_argument('--parquet-sidecar', action='store_true',
+                        help="Also write every tab as Parquet next to the workbook")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Record tracemalloc peak memory per stage (slows large runs down several times)")
+    parser.add_argument('--profile', nargs='?', const=os.path.join(BASE_DIR, 'Talent_Metrics_Model_2025.prof'),
+                        metavar='STATS_FILE', help="Run under cProfile and save the stats (default next to the output)")
+    args = parser.parse_args()
+    options = dict(constant_memory=args.constant_memory, parquet_sidecar=args.parquet_sidecar,
+                   trace_memory=args.trace_memory)
+    if args.profile:
+        profile_call(generate_model, args.profile, **options)
+    else:
+        generate_model(**options)
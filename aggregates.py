@@ -0,0 +1,151 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from department_taxonomy import EXIT_TYPE_DTYPE, department_dtype
+from timeseries import resample_last
+
+# --- PRECOMPUTED AGGREGATES ---
+# The dashboard's sidebar filters only ever ask "which departments, which
+# periods, which dates". AggregateCube answers those by slicing arrays that were
+# summed once at load time, instead of re-running group-bys and merges over the
+# raw frames on every rerun.
+
+
+class AggregateCube:
+    """Exit counts as a dense (department x exit type x period) array, plus
+    training totals per department and the sorted headcount dates.
+
+    Departments and exit types use the shared categorical codes, so a filter
+    is a boolean mask over an axis. Built once per data load; every query is
+    O(departments x types x periods), independent of the number of raw rows.
+    """
+
+    def __init__(self, df_exits, df_training, df_hc=None, dept_col='Dept_Unified',
+                 period_col='Period', date_col='Fecha'):
+        self.departments = department_dtype().categories
+        self.exit_types = EXIT_TYPE_DTYPE.categories
+
+        if period_col in df_exits.columns:
+            period_codes, self.periods = pd.factorize(df_exits[period_col].astype(str), sort=True)
+        else:
+            period_codes, self.periods = np.zeros(len(df_exits), dtype=np.int64), pd.Index(['All'])
+        dept_codes = self._dept_codes(df_exits, dept_col)
+        if len(dept_codes):
+            type_codes = df_exits['Type'].astype(EXIT_TYPE_DTYPE).cat.codes.to_numpy().astype(np.int64)
+            counts = df_exits['Count'].to_numpy(dtype=float)
+        else:
+            period_codes = type_codes = np.empty(0, dtype=np.int64)
+            counts = np.empty(0)
+        shape = (len(self.departments), len(self.exit_types), len(self.periods))
+        valid = (dept_codes >= 0) & (type_codes >= 0) & (period_codes >= 0)
+        flat = np.ravel_multi_index((dept_codes[valid], type_codes[valid], period_codes[valid]), shape)
+        self.exits = np.bincount(flat, weights=counts[valid], minlength=np.prod(shape)).reshape(shape)
+        self.exits_present = np.bincount(flat, minlength=np.prod(shape)).reshape(shape) > 0
+
+        train_codes = self._dept_codes(df_training, dept_col)
+        train_valid = train_codes >= 0
+        investment = df_training['Investment'].to_numpy(dtype=float)[train_valid] if len(train_codes) else np.empty(0)
+        self.training = np.bincount(train_codes[train_valid], weights=investment,
+                                    minlength=len(self.departments))
+        self.training_present = np.bincount(train_codes[train_valid], minlength=len(self.departments)) > 0
+
+        if df_hc is not None and date_col in df_hc.columns:
+            self.hc_dates = np.sort(df_hc[date_col].to_numpy(dtype='datetime64[ns]'))
+        else:
+            self.hc_dates = np.empty(0, dtype='datetime64[ns]')
+
+        # Content fingerprint, for caches that key on the cube without hashing it
+        digest = hashlib.sha256()
+        for array in (self.exits, self.exits_present, self.training, self.training_present, self.hc_dates):
+            digest.update(array.tobytes())
+        digest.update('|'.join(self.periods).encode())
+        self.key = digest.hexdigest()[:16]
+
+    def _dept_codes(self, df, dept_col):
+        if df.empty or dept_col not in df.columns:
+            return np.empty(0, dtype=np.int64)
+        return df[dept_col].astype(department_dtype()).cat.codes.to_numpy().astype(np.int64)
+
+    def dept_mask(self, depts=None):
+        """Boolean mask over the department axis (all departments when depts is None)."""
+        if depts is None:
+            return np.ones(len(self.departments), dtype=bool)
+        return np.isin(np.arange(len(self.departments)), self.departments.get_indexer(list(depts)))
+
+    def period_mask(self, periods=None):
+        if periods is None:
+            return np.ones(len(self.periods), dtype=bool)
+        return np.isin(self.periods, [str(p) for p in periods])
+
+    def observed_departments(self):
+        """Departments with any exit or training record, in taxonomy order."""
+        present = self.exits_present.any(axis=(1, 2)) | self.training_present
+        return list(self.departments[present])
+
+    def exits_by_type(self, depts=None, periods=None):
+        """Long frame Dept_Unified / Type / Count for the selected slice (observed cells only)."""
+        sel = np.ix_(self.dept_mask(depts), np.ones(len(self.exit_types), dtype=bool),
+                     self.period_mask(periods))
+        counts = self.exits[sel].sum(axis=2)
+        present = self.exits_present[sel].any(axis=2)
+        dept_idx, type_idx = np.nonzero(present)
+        dept_labels = self.departments[self.dept_mask(depts)]
+        return pd.DataFrame({
+            'Dept_Unified': pd.Categorical(dept_labels[dept_idx], dtype=department_dtype()),
+            'Type': pd.Categorical(self.exit_types[type_idx], dtype=EXIT_TYPE_DTYPE),
+            'Count': counts[dept_idx, type_idx],
+        })
+
+    def training_roi(self, depts=None, periods=None, exit_type='Voluntary'):
+        """Training spend vs exits of exit_type per department.
+
+        Only departments with both a training and an exit record are returned
+        (the inner join the dashboard used to compute with pd.merge).
+        """
+        t = self.exit_types.get_loc(exit_type)
+        period_sel = self.period_mask(periods)
+        counts = self.exits[:, t, period_sel].sum(axis=1)
+        keep = self.dept_mask(depts) & self.training_present & self.exits_present[:, t, period_sel].any(axis=1)
+        return pd.DataFrame({
+            'Dept_Unified': pd.Categorical(self.departments[keep], dtype=department_dtype()),
+            'Investment': self.training[keep],
+            'Count': counts[keep],
+        })
+
+    def department_summary(self, depts=None, periods=None):
+        """Per observed department: training Investment, Voluntary, Dismissal and Total_Exits."""
+        period_sel = self.period_mask(periods)
+        by_type = self.exits[:, :, period_sel].sum(axis=2)
+        keep = self.dept_mask(depts) & (self.exits_present[:, :, period_sel].any(axis=(1, 2)) | self.training_present)
+        summary = pd.DataFrame(by_type[keep], columns=list(self.exit_types))
+        summary.insert(0, 'Investment', self.training[keep])
+        summary.insert(0, 'Dept_Unified', pd.Categorical(self.departments[keep], dtype=department_dtype()))
+        summary['Total_Exits'] = by_type[keep].sum(axis=1)
+        return summary
+
+    def date_slice(self, start, end):
+        """Positional slice of the date-sorted headcount rows within [start, end] (inclusive days)."""
+        lo = np.searchsorted(self.hc_dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        hi = np.searchsorted(self.hc_dates, np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1), 'ns'),
+                             side='left')
+        return slice(int(lo), int(hi))
+
+
+def headcount_by_period(df_hc, groups, freq='Q', date_col='Fecha'):
+    """Last headcount snapshot of each period, with entity columns summed into groups.
+
+    groups maps an output column to the entity columns it adds up (missing
+    columns count as 0). The 'date' column is the snapshot's own date, so
+    irregular snapshot calendars are kept as they are. freq=None keeps every
+    snapshot.
+    """
+    if df_hc.empty:
+        return pd.DataFrame(columns=['date', *groups])
+    out = pd.DataFrame({'date': df_hc[date_col]})
+    for name, cols in groups.items():
+        present = [c for c in cols if c in df_hc.columns]
+        out[name] = df_hc[present].fillna(0).sum(axis=1) if present else 0
+    out = out.sort_values('date').reset_index(drop=True)
+    return out if freq is None else resample_last(out, freq)
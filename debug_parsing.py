@@ -1,65 +1,43 @@
 import pandas as pd
 import numpy as np
 
-def parse_messy_table(df, start_keyword, end_condition_func, col_mapping=None):
-    start_idx = df[df.apply(lambda row: row.astype(str).str.contains(start_keyword, case=False, na=False).any(), axis=1)].index
-    print(f"Keyword: {start_keyword}, Start Indexes: {list(start_idx)}")
-    if len(start_idx) == 0:
-        return pd.DataFrame()
-    
-    header_row_idx = start_idx[0] + 1
-    header_row = df.iloc[header_row_idx]
-    print(f"Header Row at {header_row_idx}: {header_row.values}")
-    
-    data_rows = []
-    for i in range(header_row_idx + 1, len(df)):
-        row = df.iloc[i]
-        if end_condition_func(row):
-            print(f"End condition met at index {i}: {row.values[:2]}")
-            break
-        data_rows.append(row)
-        
-    extracted_df = pd.DataFrame(data_rows)
-    print(f"Extracted DF shape: {extracted_df.shape}")
-    
-    if col_mapping and not extracted_df.empty and len(col_mapping) <= extracted_df.shape[1]:
-         extracted_df = extracted_df.iloc[:, :len(col_mapping)]
-         extracted_df.columns = col_mapping
-    elif not extracted_df.empty:
-        extracted_df.columns = header_row
-        
-    return extracted_df
+from messy_tables import EXIT_BLOCK_SPECS, SheetIndex
+
+def debug_tables(df, specs, **options):
+    index = SheetIndex(df)
+    print(f"Blank-row separators: {index.blank_rows.tolist()}")
+    for title, block in index.blocks.items():
+        print(f"Block: {title!r} rows {block['rows']} cols {block['cols']}")
+    for name, spec in specs.items():
+        start_idx = index.find_title(spec['keyword']) if spec.get('as_title') else index.find(spec['keyword'])
+        print(f"Keyword: {spec['keyword']}, Start Index: {start_idx}")
+        if start_idx is not None and start_idx + 1 < len(df):
+            print(f"Header Row at {start_idx + 1}: {df.iloc[start_idx + 1].values}")
+
+    tables = index.extract_many(specs, **options)
+    for name, extracted_df in tables.items():
+        print(f"{name}: Extracted DF shape: {extracted_df.shape}")
+        if not extracted_df.empty:
+            print(f"  Rows {extracted_df.index[0]}..{extracted_df.index[-1]}")
+    return tables
 
 try:
     exits_file = '2025.xlsx'
     print(f"Reading {exits_file} - Internal exits...")
     df_exits_raw = pd.read_excel(exits_file, sheet_name='Internal exits', header=None)
-    
-    df_vol = parse_messy_table(
-        df_exits_raw, 
-        "Voluntary exit per Department", 
-        lambda r: pd.isna(r[0]) or str(r[0]).lower() == 'total',
-        col_mapping=['Department', 'Count']
-    )
-    
-    df_dis = parse_messy_table(
-        df_exits_raw, 
-        "Disciplinary dismissal", 
-        lambda r: pd.isna(r[0]) or str(r[0]).lower() == 'total',
-        col_mapping=['Department', 'Count']
-    )
+
+    exit_tables = debug_tables(df_exits_raw, EXIT_BLOCK_SPECS)
 
     train_file = '2025.xlsx'
     print(f"\nReading {train_file} - Training investment...")
     df_train_raw = pd.read_excel(train_file, sheet_name='Training investment', header=None)
-    df_train = parse_messy_table(
-        df_train_raw,
-        "Training investment by department",
-        lambda r: pd.isna(r[0]) or str(r[0]).lower() == 'total',
-        col_mapping=['Department', 'Investment', 'Hours']
-    )
+    train_tables = debug_tables(df_train_raw, {
+        'Training': {'keyword': "Training investment by department",
+                     'col_mapping': ['Department', 'Investment', 'Hours']},
+    })
 
 except Exception as e:
     import traceback
     print(f"ERROR: {e}")
     traceback.print_exc()
+
@@ -0,0 +1,81 @@
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# --- DEPARTMENT TAXONOMY ---
+# Single source of truth for unifying raw department labels across the
+# dashboard, the Excel generator and the exports. The mapping lives in
+# department_taxonomy.csv (versioned by its '# version:' header line).
+# Normalization is O(unique labels): each distinct raw label is resolved once
+# and the result is broadcast back to the rows through factorized codes.
+
+TAXONOMY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'department_taxonomy.csv')
+OTHER = 'Other'
+
+# Exit types produced by the exits loaders; shared so every frame agrees on codes
+EXIT_TYPE_DTYPE = pd.CategoricalDtype(['Voluntary', 'Dismissal'])
+
+
+def normalize_key(label):
+    """Casefolds, strips accents and collapses whitespace/punctuation: 'Project/ Product' -> 'project product'."""
+    text = unicodedata.normalize('NFKD', str(label)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^0-9a-z]+', ' ', text.casefold()).strip()
+
+
+@lru_cache(maxsize=None)
+def load_taxonomy(path=TAXONOMY_FILE):
+    """Returns (version, {normalized label: department}, departments in file order + Other)."""
+    version = None
+    with open(path, encoding='utf-8') as fh:
+        first_line = fh.readline()
+    if first_line.startswith('# version:'):
+        version = first_line.split(':', 1)[1].strip()
+    table = pd.read_csv(path, comment='#', dtype=str)
+    lookup = {normalize_key(label): dept for label, dept in zip(table['label'], table['department'])}
+    departments = list(dict.fromkeys(table['department']))
+    if OTHER not in departments:
+        departments.append(OTHER)
+    return version, lookup, departments
+
+
+def department_dtype(path=TAXONOMY_FILE):
+    """Fixed categorical dtype over every unified department, shared by all frames."""
+    return pd.CategoricalDtype(load_taxonomy(path)[2])
+
+
+def shared_dtypes(path=TAXONOMY_FILE):
+    """Column name -> fixed categorical dtype for the unified department and exit-type columns."""
+    dtype = department_dtype(path)
+    return {'Dept_Unified': dtype, 'Unified_Dept': dtype, 'Type': EXIT_TYPE_DTYPE}
+
+
+def resolve_labels(values, path=TAXONOMY_FILE):
+    """Returns (codes, resolved): factorized codes per row and the department of each distinct label."""
+    _, lookup, _ = load_taxonomy(path)
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    resolved = np.array([lookup.get(normalize_key(u), OTHER) for u in uniques] + [OTHER], dtype=object)
+    return codes, resolved
+
+
+def unify_departments(values, path=TAXONOMY_FILE):
+    """Maps raw department labels to a Categorical of unified departments (missing/unknown -> Other).
+
+    The result always uses department_dtype(), so group-bys, merges and
+    filters across frames work on the same integer codes.
+    """
+    values = pd.Series(values)
+    codes, resolved = resolve_labels(values, path)
+    dtype = department_dtype(path)
+    label_codes = dtype.categories.get_indexer(resolved)
+    return pd.Series(pd.Categorical.from_codes(label_codes[codes], dtype=dtype), index=values.index)
+
+
+def unmapped_labels(values, path=TAXONOMY_FILE):
+    """Distinct non-empty raw labels that the taxonomy does not know."""
+    _, lookup, _ = load_taxonomy(path)
+    uniques = pd.Series(values).dropna().unique()
+    return sorted(str(u) for u in uniques if normalize_key(u) not in lookup)
@@ -0,0 +1,194 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from department_taxonomy import EXIT_TYPE_DTYPE, department_dtype, normalize_key, unify_departments
+
+# --- EVENT-LEVEL EXITS ---
+# One row per leaver (date, entity, department, exit type, tenure), read from an
+# optional 'Exit events' sheet. Unlike the aggregated blocks of 'Internal exits',
+# these can be filtered by date. ExitEventStore keeps the events as compact
+# code arrays sorted by date; every (date window x departments x exit type)
+# count is a few binary searches, independent of the number of events.
+
+EVENT_SHEET = 'Exit events'
+
+# Canonical column -> accepted header labels (compared with normalize_key)
+EVENT_COLUMNS = {
+    'Fecha': ['fecha', 'fecha baja', 'fecha de baja', 'exit date', 'date'],
+    'Entity': ['entity', 'entidad', 'empresa', 'company'],
+    'Department': ['department', 'departamento', 'dept'],
+    'Type': ['type', 'exit type', 'tipo', 'tipo de baja', 'motivo'],
+    'Tenure_Months': ['tenure months', 'tenure', 'antiguedad meses', 'antiguedad'],
+}
+DEFAULT_ENTITY = 'Internal'
+
+# Raw exit-type labels are classified by these (normalized) fragments
+EXIT_TYPE_KEYWORDS = {
+    'Voluntary': ['volunt', 'resign', 'dimision', 'baja voluntaria'],
+    'Dismissal': ['dismiss', 'despido', 'disciplin', 'objective', 'objetivo', 'termination'],
+}
+
+
+def classify_exit_types(values):
+    """Maps raw exit-type labels to EXIT_TYPE_DTYPE (unrecognized labels become NaN).
+
+    Each distinct label is classified once and broadcast back through its codes.
+    """
+    codes, uniques = pd.factorize(pd.Series(values))
+    resolved = []
+    for label in uniques:
+        key = normalize_key(label)
+        match = next((t for t, fragments in EXIT_TYPE_KEYWORDS.items() if any(f in key for f in fragments)), None)
+        resolved.append(match)
+    resolved = pd.Categorical(resolved + [None], dtype=EXIT_TYPE_DTYPE)
+    return pd.Series(resolved[codes], index=pd.Series(values).index)
+
+
+def parse_exit_type_summary(df_raw, header_label='Exit type'):
+    """Exits per raw exit type from the exit-type summary of the 'Internal exits' sheet.
+
+    The sheet has a coarse summary (Voluntary / Dismissal) and a detailed one
+    (Voluntary / Disciplinary / Objective), both headed by header_label; the
+    one listing the most types is used. Rows run until a blank or 'total'
+    first cell. Returns a Series of counts indexed by the raw type label.
+    """
+    if df_raw.empty:
+        return pd.Series(dtype=float)
+    first = df_raw.iloc[:, 0]
+    text = first.where(first.notna(), '').astype(str).str.strip().str.lower().to_numpy()
+    ends = np.flatnonzero((text == '') | (text == 'total'))
+    best = None
+    for header in np.flatnonzero(text == header_label.lower()):
+        stop = ends[ends > header]
+        body = (header + 1, int(stop[0]) if len(stop) else len(text))
+        if best is None or body[1] - body[0] > best[1] - best[0]:
+            best = body
+    if best is None:
+        return pd.Series(dtype=float)
+    rows = df_raw.iloc[best[0]:best[1]]
+    counts = pd.to_numeric(rows.iloc[:, 1], errors='coerce').to_numpy(dtype=float)
+    summary = pd.Series(counts, index=rows.iloc[:, 0].astype(str).str.strip().to_numpy())
+    return summary.dropna()
+
+
+def normalize_events(df_raw):
+    """Canonical event frame (Fecha, Entity, Department, Dept_Unified, Type, Tenure_Months).
+
+    Headers are matched against EVENT_COLUMNS; a missing Entity column
+    defaults to DEFAULT_ENTITY and a missing tenure to NaN. Rows without a
+    valid date or a recognized exit type are dropped.
+    """
+    aliases = {normalize_key(a): col for col, labels in EVENT_COLUMNS.items() for a in labels}
+    renamed = {c: aliases[normalize_key(c)] for c in df_raw.columns if normalize_key(c) in aliases}
+    df = df_raw.rename(columns=renamed)
+    df = df.loc[:, ~df.columns.duplicated()]
+    if not {'Fecha', 'Department', 'Type'} <= set(df.columns):
+        return pd.DataFrame(columns=['Fecha', 'Entity', 'Department', 'Dept_Unified', 'Type', 'Tenure_Months'])
+
+    events = pd.DataFrame({
+        'Fecha': pd.to_datetime(df['Fecha'], errors='coerce'),
+        'Entity': df['Entity'].astype(str).str.strip() if 'Entity' in df.columns else DEFAULT_ENTITY,
+        'Department': df['Department'],
+        'Type': classify_exit_types(df['Type']),
+        'Tenure_Months': pd.to_numeric(df['Tenure_Months'], errors='coerce') if 'Tenure_Months' in df.columns
+                         else np.nan,
+    })
+    events = events[events['Fecha'].notna() & events['Type'].notna()].reset_index(drop=True)
+    events.insert(3, 'Dept_Unified', unify_departments(events['Department']))
+    return events
+
+
+class ExitEventStore:
+    """Exit events as date-sorted code arrays with a (entity, department, type) date index.
+
+    The index is one sorted int64 array of key * span + day, where key
+    enumerates (entity, department, exit type) and day is the event's offset
+    in days from the first event. The events of a key inside a date window
+    form one contiguous run of it, so the counts of every key for a window
+    are two vectorized searchsorted calls.
+    """
+
+    def __init__(self, events, dept_col='Dept_Unified', date_col='Fecha'):
+        self.departments = department_dtype().categories
+        self.exit_types = EXIT_TYPE_DTYPE.categories
+        order = np.argsort(events[date_col].to_numpy(dtype='datetime64[ns]'), kind='stable')
+        events = events.iloc[order]
+        entity_codes, self.entities = pd.factorize(events['Entity'].astype(str), sort=True)
+
+        self.dates = events[date_col].dt.normalize().to_numpy(dtype='datetime64[ns]')
+        self.dept_codes = events[dept_col].astype(department_dtype()).cat.codes.to_numpy().astype(np.int32)
+        self.type_codes = events['Type'].astype(EXIT_TYPE_DTYPE).cat.codes.to_numpy().astype(np.int8)
+        self.entity_codes = entity_codes.astype(np.int16)
+        self.tenure = events['Tenure_Months'].to_numpy(dtype=float)
+
+        self.origin = self.dates[0] if len(self.dates) else np.datetime64('1970-01-01', 'ns')
+        self.days = ((self.dates - self.origin) // np.timedelta64(1, 'D')).astype(np.int64)
+        self.span = int(self.days[-1]) + 2 if len(self.days) else 1
+        self.shape = (len(self.entities), len(self.departments), len(self.exit_types))
+        self.keys = np.ravel_multi_index((self.entity_codes, self.dept_codes, self.type_codes), self.shape)
+        self.index = np.sort(self.keys * self.span + self.days)
+
+        digest = hashlib.sha256()
+        for array in (self.index, self.tenure):
+            digest.update(array.tobytes())
+        digest.update('|'.join(self.entities).encode())
+        self.key = digest.hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _days(self, dates):
+        dates = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(dates))).normalize().to_numpy(dtype='datetime64[ns]')
+        return (dates - self.origin) // np.timedelta64(1, 'D')
+
+    def _day_bounds(self, starts=None, ends=None):
+        lo = np.zeros(1, dtype=np.int64) if starts is None else np.clip(self._days(starts), 0, self.span - 1)
+        hi = np.full(1, self.span - 1) if ends is None else np.clip(self._days(ends) + 1, 0, self.span - 1)
+        return lo, np.maximum(lo, hi)
+
+    def window(self, start=None, end=None):
+        """Positional slice of the events dated within [start, end] (inclusive days)."""
+        lo, hi = self._day_bounds(start, end)
+        return slice(int(np.searchsorted(self.days, lo[0], side='left')),
+                     int(np.searchsorted(self.days, hi[0], side='left')))
+
+    def window_counts(self, starts=None, ends=None):
+        """Exit counts shaped (windows, entities, departments, exit types) for each [start, end] window."""
+        lo, hi = self._day_bounds(starts, ends)
+        base = np.arange(np.prod(self.shape), dtype=np.int64) * self.span
+        counts = (np.searchsorted(self.index, base + hi[:, None])
+                  - np.searchsorted(self.index, base + lo[:, None]))
+        return counts.reshape(len(counts), *self.shape)
+
+    def count_matrix(self, start=None, end=None):
+        """Exit counts shaped (entities, departments, exit types) for the date window."""
+        return self.window_counts(start, end)[0]
+
+    def count(self, start=None, end=None, depts=None, exit_type=None, entities=None):
+        """Number of exits in the window for the selected departments, exit type and entities."""
+        counts = self.count_matrix(start, end)
+        if entities is not None:
+            counts = counts[self.entities.isin(list(entities))]
+        if depts is not None:
+            counts = counts[:, self.departments.isin(list(depts))]
+        if exit_type is not None:
+            counts = counts[:, :, self.exit_types.get_loc(exit_type)]
+        return int(counts.sum())
+
+    def exits_by_type(self, depts=None, start=None, end=None):
+        """Long frame Dept_Unified / Type / Count for the window (non-zero cells only).
+
+        Same layout as AggregateCube.exits_by_type, so charts can use either.
+        """
+        counts = self.count_matrix(start, end).sum(axis=0)
+        if depts is not None:
+            counts = counts * self.departments.isin(list(depts))[:, None]
+        dept_idx, type_idx = np.nonzero(counts)
+        return pd.DataFrame({
+            'Dept_Unified': pd.Categorical(self.departments[dept_idx], dtype=department_dtype()),
+            'Type': pd.Categorical(self.exit_types[type_idx], dtype=EXIT_TYPE_DTYPE),
+            'Count': counts[dept_idx, type_idx].astype(float),
+        })
+
@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+
+from messy_tables import SheetIndex
+
+# --- HIRING FORECAST ENGINE ---
+# Headcount projections for every entity (and scenario) at once. Openings,
+# churn and growth are arrays that broadcast against each other, so a single
+# entity, all entities, or a churn x growth scenario grid are the same
+# computation: opening * (1 + growth) ** month, with attrition and hiring
+# derived from that path. Nothing loops over months or entities.
+
+
+def parse_turnover_rates(df_raw, label="Total turnover rate"):
+    """Annual turnover rate per entity from the raw 'TurnoverRetention' sheet.
+
+    The entity names are taken from the header row above the summary block
+    (the last row above label whose first cell is empty). Returns a Series
+    indexed by entity name, 'Total' included when present.
+    """
+    index = SheetIndex(df_raw)
+    rate_row = index.find(label)
+    if rate_row is None:
+        return pd.Series(dtype=float)
+    header_rows = [r for r in range(rate_row) if index.blank[r, 0] and not index.row_empty[r]]
+    if not header_rows:
+        return pd.Series(dtype=float)
+    header = df_raw.iloc[header_rows[-1]]
+    rates = pd.to_numeric(df_raw.iloc[rate_row], errors='coerce')
+    keep = header.notna() & rates.notna()
+    return pd.Series(rates[keep].to_numpy(dtype=float), index=[str(h).strip() for h in header[keep]])
+
+
+# Modelled entities: the headcount columns each sums and the TurnoverRetention
+# column holding its annual turnover. Shared by the Excel Generator and the
+# dashboard so both project and simulate the same workforce.
+MODEL_ENTITIES = {
+    'Leadtech': (['Leadtech'], 'Internal + YouzhuHUI'),
+    'Randstad': (['Randstad'], 'Randstad'),
+    'Deel': (['Deel'], 'Deel'),
+    'Freelance': (['Freelance'], 'Freelance/B2B'),
+}
+DEFAULT_ANNUAL_TURNOVER = 0.17 # used when the turnover sheet has no rate for an entity (nor a 'Total')
+
+
+def monthly_rate(annual_rate):
+    """Monthly rate from an annual one (annual / 12, the convention used by the model)."""
+    return np.asarray(annual_rate, dtype=float) / 12
+
+
+def trailing_growth(dates, values, months=12):
+    """Compound monthly growth of values over the trailing window of the given months."""
+    series = pd.Series(np.asarray(values, dtype=float), index=pd.DatetimeIndex(dates)).sort_index()
+    if series.empty:
+        return 0.0
+    end = series.index[-1]
+    window = series[series.index >= end - pd.DateOffset(months=months)]
+    start_value, end_value = window.iloc[0], window.iloc[-1]
+    elapsed = (window.index[-1] - window.index[0]).days / 30.44
+    if start_value <= 0 or elapsed <= 0:
+        return 0.0
+    return float((end_value / start_value) ** (1 / elapsed) - 1)
+
+
+def entity_inputs(df_hc, turnover_rates, entities=MODEL_ENTITIES, date_col='Fecha'):
+    """Opening headcount, monthly churn and trailing growth of the modelled entities.
+
+    df_hc is the headcount export sorted by date_col; turnover_rates is the
+    Series from parse_turnover_rates. Entities without a rate fall back to the
+    'Total' rate, then to DEFAULT_ANNUAL_TURNOVER. Growth is the trailing
+    12-month growth of all entities together. Returns (opening, churn, growth)
+    with opening and churn as Series indexed by entity.
+    """
+    columns = {e: [c for c in cols if c in df_hc.columns] for e, (cols, _) in entities.items()}
+    heads = pd.DataFrame({e: df_hc[cols].fillna(0).sum(axis=1) for e, cols in columns.items()})
+    fallback = turnover_rates.get('Total', DEFAULT_ANNUAL_TURNOVER)
+    annual = [turnover_rates.get(col, fallback) for _, col in entities.values()]
+    opening = heads.iloc[-1].astype(float)
+    churn = pd.Series(monthly_rate(annual), index=list(entities))
+    return opening, churn, trailing_growth(df_hc[date_col], heads.sum(axis=1))
+
+
+def project(opening, churn, growth, horizon):
+    """Projects headcount paths; all inputs broadcast, the month axis is appended last.
+
+    opening, churn (monthly) and growth (monthly) may be scalars or arrays of
+    any broadcastable shape, e.g. (entities,) or (churn, growth, entities).
+    Returns a dict of float arrays shaped (..., horizon):
+      'Projected_Opening_HC', 'Predicted_Attrition', 'Net_Growth_Target',
+      'Recruitment_Target' (attrition + growth, never negative).
+    """
+    opening, churn, growth = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (opening, churn, growth)))
+    month = np.arange(horizon)
+    opening_hc = opening[..., None] * (1 + growth[..., None]) ** month
+    attrition = opening_hc * churn[..., None]
+    net_growth = opening_hc * growth[..., None]
+    return {
+        'Projected_Opening_HC': opening_hc,
+        'Predicted_Attrition': attrition,
+        'Net_Growth_Target': net_growth,
+        'Recruitment_Target': np.maximum(attrition + net_growth, 0),
+    }
+
+
+def forecast_table(opening, churn, growth, horizon, start_date):
+    """Long forecast frame (Entity x Month) for Series opening/churn indexed by entity.
+
+    growth is a scalar or a Series aligned with opening. A 'Total' entity sums
+    the entity rows. Values are rounded to whole people.
+    """
+    entities = list(opening.index)
+    growth = growth.reindex(entities).to_numpy() if isinstance(growth, pd.Series) else growth
+    paths = project(opening.to_numpy(), churn.reindex(entities).to_numpy(), growth, horizon)
+    paths = {k: np.vstack([v, v.sum(axis=0, keepdims=True)]) for k, v in paths.items()}
+    step = pd.DateOffset(months=1)
+    months = pd.date_range(pd.Timestamp(start_date) + step, periods=horizon, freq=step)
+    table = pd.DataFrame({
+        'Entity': np.repeat(entities + ['Total'], horizon),
+        'Month': np.tile(months.date, len(entities) + 1),
+    })
+    for name, values in paths.items():
+        table[name] = np.round(values.ravel()).astype(int)
+    return table
+
+
+def allocate(table, shares, value_cols=('Predicted_Attrition', 'Recruitment_Target')):
+    """Splits one entity's forecast rows across groups by share (e.g. departments by exit share).
+
+    Returns a long frame with one row per (group, month); shares are normalised.
+    """
+    shares = shares[shares > 0]
+    if table.empty or shares.empty:
+        return pd.DataFrame(columns=['Entity', 'Month', *value_cols])
+    weights = (shares / shares.sum()).to_numpy()
+    out = pd.DataFrame({
+        'Entity': np.repeat(shares.index.astype(str), len(table)),
+        'Month': np.tile(table['Month'].to_numpy(), len(shares)),
+    })
+    for col in value_cols:
+        out[col] = np.round(np.outer(weights, table[col].to_numpy()).ravel()).astype(int)
+    return out
+
+
+def scenario_grid(opening, churn, churn_factors, growth_rates, horizon):
+    """Total recruitment need for every (churn factor x monthly growth) scenario in one batch.
+
+    churn is the per-entity monthly churn; each factor scales it. Returns one
+    row per scenario with the horizon's total attrition, recruitment and the
+    closing headcount.
+    """
+    factors = np.asarray(churn_factors, dtype=float)
+    rates = np.asarray(growth_rates, dtype=float)
+    paths = project(np.asarray(opening, dtype=float),
+                    factors[:, None, None] * np.asarray(churn, dtype=float),
+                    rates[None, :, None], horizon)
+    closing = paths['Projected_Opening_HC'][..., -1] * (1 + rates[None, :, None])
+    grid = pd.DataFrame({
+        'Churn_Factor': np.repeat(factors, len(rates)),
+        'Monthly_Growth': np.tile(rates, len(factors)),
+    })
+    grid['Predicted_Attrition'] = np.round(paths['Predicted_Attrition'].sum(axis=(2, 3)).ravel()).astype(int)
+    grid['Recruitment_Target'] = np.round(paths['Recruitment_Target'].sum(axis=(2, 3)).ravel()).astype(int)
+    grid['Closing_HC'] = np.round(closing.sum(axis=2).ravel()).astype(int)
+    return grid
+
+
+# --- MONTE CARLO ATTRITION ---
+# Exits are drawn for every (path, entity, month) in one binomial call: each
+# month every person on the plan leaves with the entity's monthly churn
+# probability, and leavers are backfilled so the plan headcount holds.
+
+SIMULATION_PATHS = 10_000
+SIMULATION_MONTHS = 24
+SIMULATION_SEED = 2025
+PERCENTILES = (10, 50, 90)
+
+
+def simulate_attrition(opening, churn, horizon, growth=0.0, n_paths=SIMULATION_PATHS, seed=SIMULATION_SEED):
+    """Simulated exits shaped (n_paths, entities, horizon), plus the plan from project().
+
+    opening and churn (monthly probability) are per-entity arrays; growth is
+    the monthly plan growth (scalar or per entity). The same seed always
+    returns the same paths.
+    """
+    plan = project(opening, churn, growth, horizon)
+    heads = np.rint(plan['Projected_Opening_HC']).astype(np.int64)
+    p = np.broadcast_to(np.clip(np.asarray(churn, dtype=float), 0, 1)[..., None], heads.shape)
+    rng = np.random.default_rng(seed)
+    exits = rng.binomial(heads, p, size=(n_paths, *heads.shape))
+    return exits, plan
+
+
+def percentile_bands(exits, plan, entities, start_date, percentiles=PERCENTILES):
+    """Long frame of exit and cumulative recruitment percentiles per entity and month.
+
+    A 'Total' entity is computed from the per-path sums, so its bands are the
+    bands of the total (not the sum of the entity bands). Cumulative
+    recruitment is cumulative exits plus the plan's net growth.
+    """
+    exits = np.concatenate([exits, exits.sum(axis=1, keepdims=True)], axis=1)
+    heads, growth_hires = (np.vstack([v, v.sum(axis=0, keepdims=True)])
+                           for v in (plan['Projected_Opening_HC'], plan['Net_Growth_Target']))
+    recruitment = np.cumsum(exits, axis=2) + np.cumsum(growth_hires, axis=1)
+    exit_bands = np.rint(np.percentile(exits, percentiles, axis=0))
+    recruit_bands = np.rint(np.percentile(recruitment, percentiles, axis=0))
+
+    labels = list(entities) + ['Total']
+    horizon = heads.shape[1]
+    step = pd.DateOffset(months=1)
+    months = pd.date_range(pd.Timestamp(start_date) + step, periods=horizon, freq=step)
+    bands = pd.DataFrame({
+        'Entity': np.repeat(labels, horizon),
+        'Month': np.tile(months.date, len(labels)),
+        'Plan_HC': np.rint(heads.ravel()).astype(int),
+    })
+    for q, values in zip(percentiles, exit_bands):
+        bands[f'Exits_P{q}'] = values.ravel()
+    for q, values in zip(percentiles, recruit_bands):
+        bands[f'Cum_Recruitment_P{q}'] = values.ravel()
+    return bands
+
+
+def simulate_bands(df_hc, turnover_rates, horizon=SIMULATION_MONTHS, entities=MODEL_ENTITIES, date_col='Fecha'):
+    """P10/P50/P90 bands of exits and recruitment need per modelled entity over horizon months.
+
+    Inputs come from entity_inputs, so the workbook and the dashboard draw the
+    same paths from the same headcount and turnover data.
+    """
+    if df_hc.empty:
+        return pd.DataFrame()
+    opening, churn, growth = entity_inputs(df_hc, turnover_rates, entities, date_col)
+    exits, plan = simulate_attrition(opening.to_numpy(), churn.to_numpy(), horizon, growth=growth)
+    return percentile_bands(exits, plan, list(entities), df_hc[date_col].iloc[-1])
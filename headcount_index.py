@@ -0,0 +1,104 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# --- AVERAGE HEADCOUNT INDEX ---
+# Turnover rates divide exits by the average headcount of a window. The
+# headcount export is an irregular series of snapshots, so the average is the
+# time-weighted mean of the line through them: integral / window length. The
+# integral is precomputed as a cumulative trapezoid per entity column, so any
+# window costs one binary search per edge plus O(1) arithmetic.
+
+
+class HeadcountIndex:
+    """Cumulative trapezoid integrals of every entity column over the snapshot dates.
+
+    Between snapshots headcount is interpolated linearly; windows reaching
+    beyond the first or last snapshot are clipped to the covered range.
+    """
+
+    def __init__(self, df_hc, columns=None, date_col='Fecha'):
+        df = df_hc.sort_values(date_col).drop_duplicates(date_col, keep='last')
+        if columns is None:
+            columns = [c for c in df.columns if c != date_col and pd.api.types.is_numeric_dtype(df[c])]
+        self.columns = pd.Index(columns)
+        self.dates = df[date_col].to_numpy(dtype='datetime64[ns]')
+        self.origin = self.dates[0] if len(self.dates) else np.datetime64('1970-01-01', 'ns')
+        self.days = (self.dates - self.origin) / np.timedelta64(1, 'D')
+        self.values = df.reindex(columns=list(self.columns)).fillna(0).to_numpy(dtype=float)
+
+        widths = np.diff(self.days)[:, None]
+        self.cumulative = np.zeros_like(self.values)
+        np.cumsum((self.values[1:] + self.values[:-1]) / 2 * widths, axis=0, out=self.cumulative[1:])
+
+        digest = hashlib.sha256()
+        for array in (self.dates, self.values):
+            digest.update(array.tobytes())
+        digest.update('|'.join(map(str, self.columns)).encode())
+        self.key = digest.hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _offsets(self, dates):
+        dates = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(dates))).to_numpy(dtype='datetime64[ns]')
+        return np.clip((dates - self.origin) / np.timedelta64(1, 'D'), self.days[0], self.days[-1])
+
+    def _locate(self, x):
+        """Segment of each offset and the distance into it (the last snapshot uses the last segment)."""
+        seg = np.clip(np.searchsorted(self.days, x, side='right') - 1, 0, max(len(self.days) - 2, 0))
+        return seg, x - self.days[seg]
+
+    def _slopes(self, seg):
+        if len(self.days) < 2:
+            return np.zeros((len(seg), len(self.columns)))
+        widths = (self.days[seg + 1] - self.days[seg])[:, None]
+        return (self.values[seg + 1] - self.values[seg]) / widths
+
+    def _integral(self, x):
+        seg, dx = self._locate(x)
+        return (self.cumulative[seg] + self.values[seg] * dx[:, None]
+                + 0.5 * self._slopes(seg) * dx[:, None] ** 2)
+
+    def at(self, dates):
+        """Interpolated headcount per column at each date, shape (dates, columns)."""
+        seg, dx = self._locate(self._offsets(dates))
+        return self.values[seg] + self._slopes(seg) * dx[:, None]
+
+    def averages(self, starts, ends):
+        """Time-weighted average headcount per column for each [start, end] window.
+
+        starts and ends are equal-length date arrays (end inclusive, to the
+        day). Returns a DataFrame with one row per window; a window that
+        collapses to a single day after clipping gets that day's headcount.
+        """
+        if not len(self):
+            return pd.DataFrame(np.nan, index=range(len(np.atleast_1d(starts))), columns=self.columns)
+        lo = self._offsets(starts)
+        hi = self._offsets(pd.to_datetime(np.atleast_1d(ends)) + pd.Timedelta(days=1))
+        length = hi - lo
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = (self._integral(hi) - self._integral(lo)) / length[:, None]
+        point = length <= 0
+        if point.any():
+            avg[point] = self.at(self.origin + (lo[point] * 86400e9).astype('timedelta64[ns]'))
+        return pd.DataFrame(avg, columns=self.columns)
+
+    def average(self, start, end, columns=None):
+        """Average headcount per column over [start, end] as a Series (columns subsets it)."""
+        avg = self.averages([pd.Timestamp(start)], [pd.Timestamp(end)]).iloc[0]
+        return avg if columns is None else avg[list(columns)]
+
+    def period_averages(self, freq='M', start=None, end=None):
+        """Average headcount of every calendar period (e.g. 'M', 'Q', 'Y') within the covered range."""
+        if not len(self):
+            return pd.DataFrame(columns=self.columns)
+        start = pd.Timestamp(self.dates[0] if start is None else start)
+        end = pd.Timestamp(self.dates[-1] if end is None else end)
+        periods = pd.period_range(start, end, freq=freq)
+        period_starts = np.maximum(periods.start_time.normalize(), start.normalize())
+        period_ends = np.minimum(periods.end_time.normalize(), end.normalize())
+        table = self.averages(period_starts, period_ends)
+        table.index = periods
+        return table
@@ -3,6 +3,8 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from department_taxonomy import unify_departments
+
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
     page_title="Talent Command Center 2025",
@@ -61,34 +63,12 @@ def parse_messy_table(df, start_keyword, end_condition_func, col_mapping=None):
 
 def normalize_departments(df, col_name):
     """
-    Standardizes department names for merging (e.g., IT - Front -> IT).
+    Standardizes department names for merging (e.g., IT - Front -> Tech & IT)
+    via the shared department taxonomy.
     """
     if df.empty or col_name not in df.columns:
         return df
-        
-    mapping = {
-        'CUSTOMER SERVICE': 'Customer Service',
-        'CS': 'Customer Service',
-        'PROJECT/PRODUCT': 'Product',
-        'Project/ Product': 'Product',
-        'IT - DEVELOPER': 'Tech & IT',
-        'IT - BACKOFFICE': 'Tech & IT',
-        'IT - UIUX': 'Tech & IT',
-        'IT - FRONT': 'Tech & IT',
-        'IT ': 'Tech & IT',
-        'IT': 'Tech & IT',
-        'HR-CORPORATE': 'HR',
-        'HR': 'HR',
-        'Finance, Legal and Payments': 'Finance/Legal',
-        'ACCOUNTING': 'Finance/Legal',
-        'TAX': 'Finance/Legal',
-        'PAYMENTS': 'Finance/Legal',
-        'PAID MARKETING': 'Marketing',
-        'ORGANIC MARKETING': 'Marketing',
-        'SEO': 'Marketing',
-        'DBI': 'Data/BI'
-    }
-    df['Dept_Unified'] = df[col_name].map(mapping).fillna('Other')
+    df['Dept_Unified'] = unify_departments(df[col_name])
     return df
 
 @st.cache_data
@@ -278,8 +258,8 @@ if data:
         st.subheader("Training Investment Efficiency")
         
         # Aggregate Data for Scatter
-        train_agg = df_training.groupby('Dept_Unified')['Investment'].sum().reset_index()
-        exit_agg = df_exits_dept[df_exits_dept['Type'] == 'Voluntary'].groupby('Dept_Unified')['Count'].sum().reset_index()
+        train_agg = df_training.groupby('Dept_Unified', observed=True)['Investment'].sum().reset_index()
+        exit_agg = df_exits_dept[df_exits_dept['Type'] == 'Voluntary'].groupby('Dept_Unified', observed=True)['Count'].sum().reset_index()
         
         df_roi = pd.merge(train_agg, exit_agg, on='Dept_Unified', how='inner')
         df_roi = df_roi[df_roi['Dept_Unified'].isin(selected_depts)]
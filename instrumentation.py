@@ -0,0 +1,94 @@
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- RUN INSTRUMENTATION ---
+# Stage-level timing for the batch scripts: each stage records its wall time,
+# the rows it produced and, when asked for, the peak memory traced while it ran.
+# tracemalloc hooks every allocation and slows allocation-heavy stages down
+# several times, so it is off by default to keep the timings real. The report
+# is printed as a table and saved as JSON, so slow monthly runs can be compared.
+
+
+class RunReport:
+    """Collects one record per pipeline stage.
+
+    Stages are expected to run one after another (not nested). With
+    trace_memory, the traced memory peak is reset when a stage starts, and
+    peak_mb is the peak above the memory already held at that point.
+    """
+
+    def __init__(self, name, trace_memory=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.stages = []
+        self.metadata = {}
+        self._start = time.perf_counter()
+        self._owns_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Times the enclosed block; set record['rows'] inside it when the row count is known."""
+        record = {'stage': name, 'rows': rows, 'seconds': None, 'peak_mb': None, 'error': None}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record['error'] = str(e)
+            raise
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 4)
+            if self.trace_memory:
+                record['peak_mb'] = round((tracemalloc.get_traced_memory()[1] - baseline) / 2 ** 20, 2)
+            self.stages.append(record)
+
+    def finish(self):
+        """Stops memory tracing (if this report started it) and returns the report as a dict."""
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+        return self.to_dict()
+
+    def to_dict(self):
+        return {
+            'run': self.name,
+            'started_at': self.started_at,
+            'total_seconds': round(time.perf_counter() - self._start, 4),
+            'trace_memory': self.trace_memory,
+            **self.metadata,
+            'stages': self.stages,
+        }
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.to_dict(), fh, indent=2, ensure_ascii=False, default=str)
+
+    def print_summary(self):
+        print(f"\nStage timings ({self.name}):")
+        for s in self.stages:
+            rows = '' if s['rows'] is None else s['rows']
+            peak = '' if s['peak_mb'] is None else f"{s['peak_mb']:.2f} MB"
+            status = f"  ERROR: {s['error']}" if s['error'] else ''
+            print(f"  {s['stage']:<26} {rows:>8} {s['seconds']:>8.3f}s {peak:>11}{status}")
+        print(f"  {'total':<26} {'':>8} {time.perf_counter() - self._start:>8.3f}s")
+
+
+def profile_call(func, stats_path, *args, top=25, **kwargs):
+    """Runs func under cProfile, saves the stats to stats_path and prints the top cumulative entries."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(stats_path)
+        print(f"\ncProfile stats saved to {stats_path} (top {top} by cumulative time):")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
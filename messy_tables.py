@@ -0,0 +1,303 @@
+import numpy as np
+import pandas as pd
+
+# --- BLOCK LOCATOR ---
+# Shared engine for the "messy" HR export sheets: several small tables stacked in
+# one sheet, each introduced by a title row and a header row. The sheet is
+# factorized once into an integer code matrix over its distinct cell values, and
+# every lookup works on codes and boolean masks, so extracting N tables costs one
+# pass over the sheet instead of N row loops. Only the distinct values are ever
+# stringified, so one long cell does not widen every cell to its length.
+
+
+def stringify_sheet(df):
+    """Returns (codes, labels, blank) for a raw sheet.
+
+    codes is an int matrix of the sheet's shape indexing labels (-1 for empty
+    cells), labels the lowercased string of each distinct cell value as an
+    object array, and blank the NaN mask.
+    """
+    values = df.to_numpy(dtype=object)
+    blank = pd.isna(values)
+    codes, uniques = pd.factorize(values.ravel())
+    labels = pd.Index(uniques, dtype=object).astype(str).str.lower().to_numpy(dtype=object)
+    return codes.reshape(values.shape), labels, blank
+
+
+def find_keyword_rows(codes, labels, keywords):
+    """Maps each keyword to the first row containing it (case-insensitive), or None.
+
+    Each keyword is matched against the sheet's distinct labels only, not
+    against every cell.
+    """
+    first_row = _label_index(codes, labels)
+    return {keyword: _first_match(labels, first_row, keyword) for keyword in keywords}
+
+
+def _label_index(codes, labels):
+    """First row in which each label occurs."""
+    filled = codes >= 0
+    rows = np.nonzero(filled)[0]
+    first_row = np.full(len(labels), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first_row, codes[filled], rows)
+    return first_row
+
+
+def _first_match(labels, first_row, keyword):
+    keyword = keyword.lower()
+    matches = np.fromiter((keyword in label for label in labels), dtype=bool, count=len(labels))
+    return int(first_row[matches].min()) if matches.any() else None
+
+
+def _next_true(mask):
+    """For every row i, the first row >= i where mask is True (len(mask) if none)."""
+    n = len(mask)
+    positions = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(positions[::-1])[::-1]
+
+
+class SheetIndex:
+    """Offsets of every title, header and blank-row separator in one raw sheet.
+
+    Built once per sheet in O(rows x cols); afterwards each table extraction
+    costs O(table size), so any number of KPI blocks can be read from the same
+    index without rescanning the sheet.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.n_rows = len(df)
+        if df.empty:
+            self.codes = np.empty((self.n_rows, 0), dtype=np.int64)
+            self.labels = np.empty(0, dtype=object)
+            self.blank = np.empty((self.n_rows, 0), dtype=bool)
+        else:
+            self.codes, self.labels, self.blank = stringify_sheet(df)
+        self.row_empty = self.blank.all(axis=1)
+        self.blank_rows = np.flatnonzero(self.row_empty)
+        self.label_rows = _label_index(self.codes, self.labels)
+        self._stops = {}
+        self.blocks = self._detect_blocks()
+
+    def find(self, keyword):
+        """First row whose cells contain keyword (case-insensitive), or None."""
+        return _first_match(self.labels, self.label_rows, keyword)
+
+    def find_title(self, keyword):
+        """First row of a detected block title containing keyword (case-insensitive), or None."""
+        rows = [block['title_row'] for title, block in self.blocks.items() if keyword.lower() in title.lower()]
+        return min(rows) if rows else None
+
+    def extract(self, keyword, col_mapping=None, stop_at_total=True, as_title=False,
+                skip_blank_rows=False, align_to_header=False):
+        """Extracts the table whose title row contains keyword.
+
+        The body runs from the row after the header until the first row whose
+        first cell is blank (or 'total'). With as_title, keyword is only matched
+        against block titles, skipping rows of other tables that mention it.
+        With skip_blank_rows, fully empty rows are ignored instead of ending the
+        table. With align_to_header, col_mapping is applied from the header's
+        first non-empty column.
+        """
+        title_idx = self.find_title(keyword) if as_title else self.find(keyword)
+        if title_idx is None or title_idx + 2 >= self.n_rows:
+            return pd.DataFrame()
+        header_idx = title_idx + 1
+        body_start = header_idx + 1
+
+        body_end = self._stop_rows(stop_at_total, skip_blank_rows)[body_start]
+        body_rows = np.arange(body_start, body_end)
+        if skip_blank_rows:
+            body_rows = body_rows[~self.row_empty[body_start:body_end]]
+        return self._frame_body(body_rows, header_idx, col_mapping, align_to_header)
+
+    def extract_many(self, specs, **options):
+        """Extracts several tables; specs maps an output name to extract() keyword arguments."""
+        return {name: self.extract(**spec, **options) for name, spec in specs.items()}
+
+    def extract_block(self, title, col_mapping=None):
+        """Extracts a detected block by its exact title, limited to its own column span."""
+        block = self.blocks.get(title)
+        if block is None:
+            return pd.DataFrame()
+        col_start, col_stop = block['cols']
+        body = slice(block['header_row'] + 1, block['rows'][1])
+        extracted_df = self.df.iloc[body, col_start:col_stop].infer_objects()
+        if col_mapping and len(col_mapping) <= extracted_df.shape[1]:
+            extracted_df = extracted_df.iloc[:, :len(col_mapping)]
+            extracted_df.columns = col_mapping
+        else:
+            extracted_df.columns = self.df.iloc[block['header_row'], col_start:col_stop]
+        return extracted_df
+
+    def _stop_rows(self, stop_at_total, skip_blank_rows):
+        key = (stop_at_total, skip_blank_rows)
+        if key not in self._stops:
+            end_mask = self.blank[:, 0].copy()
+            if stop_at_total:
+                end_mask |= np.isin(self.codes[:, 0], np.flatnonzero(self.labels == 'total'))
+            if skip_blank_rows:
+                end_mask &= ~self.row_empty
+            self._stops[key] = _next_true(end_mask)
+        return self._stops[key]
+
+    def _detect_blocks(self):
+        """Maps each title -> {'title_row', 'header_row', 'rows', 'cols'} (spans are [start, stop)).
+
+        A title is a text cell with empty cells to its left, right and above it,
+        and a non-empty header cell directly below it.
+        """
+        blocks = {}
+        if self.n_rows < 2:
+            return blocks
+        blank = self.blank
+        left_blank = np.ones_like(blank)
+        left_blank[:, 1:] = blank[:, :-1]
+        right_blank = np.ones_like(blank)
+        right_blank[:, :-1] = blank[:, 1:]
+        above_blank = np.ones_like(blank)
+        above_blank[1:, :] = blank[:-1, :]
+        below_filled = np.zeros_like(blank)
+        below_filled[:-1, :] = ~blank[1:, :]
+
+        rows, cols = np.nonzero(~blank & left_blank & right_blank & above_blank & below_filled)
+        values = self.df.to_numpy(dtype=object)[rows, cols]
+        is_text = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').isna().to_numpy()
+        rows, cols, values = rows[is_text], cols[is_text], values[is_text]
+
+        next_blank = {col: _next_true(blank[:, col]) for col in np.unique(cols)}
+        for row, col, title in zip(rows, cols, values):
+            header_row = row + 1
+            header_filled = np.append(~blank[header_row, col:], False)
+            col_stop = col + int(np.argmin(header_filled))
+            title = str(title).strip()
+            if title not in blocks:
+                blocks[title] = {
+                    'title_row': int(row),
+                    'header_row': int(header_row),
+                    'rows': (int(row), int(next_blank[col][header_row])),
+                    'cols': (int(col), int(col_stop)),
+                }
+        return blocks
+
+    def _frame_body(self, body_rows, header_idx, col_mapping, align_to_header):
+        if len(body_rows) == 0:
+            return pd.DataFrame()
+        extracted_df = self.df.iloc[body_rows].infer_objects()
+        return _label_columns(extracted_df, self.df.iloc[header_idx], self.blank[header_idx],
+                              col_mapping, align_to_header)
+
+
+def _label_columns(extracted_df, header_row, header_blank, col_mapping, align_to_header):
+    if col_mapping and align_to_header:
+        filled = np.flatnonzero(~header_blank)
+        start_col = int(filled[0]) if len(filled) else 0
+        extracted_df = extracted_df.iloc[:, start_col: start_col + len(col_mapping)]
+        if extracted_df.shape[1] == len(col_mapping):
+            extracted_df.columns = col_mapping
+    elif col_mapping and len(col_mapping) <= extracted_df.shape[1]:
+        extracted_df = extracted_df.iloc[:, :len(col_mapping)]
+        extracted_df.columns = col_mapping
+    else:
+        extracted_df.columns = header_row
+    return extracted_df
+
+
+def parse_messy_tables(df, specs, skip_blank_rows=False, align_to_header=False):
+    """Extracts every requested table from a raw sheet in one pass.
+
+    specs maps an output name to a dict with:
+      - 'keyword': text found in the table's title row
+      - 'col_mapping': optional list of column names for the extracted body
+      - 'stop_at_total': end the body at a 'total' row (default True)
+      - 'as_title': only match keyword in a block title (default False)
+    """
+    return SheetIndex(df).extract_many(specs, skip_blank_rows=skip_blank_rows,
+                                       align_to_header=align_to_header)
+
+
+def parse_messy_table(df, start_keyword, col_mapping=None, stop_at_total=True, **options):
+    """Single-table convenience wrapper around parse_messy_tables."""
+    spec = {'keyword': start_keyword, 'col_mapping': col_mapping, 'stop_at_total': stop_at_total}
+    return parse_messy_tables(df, {start_keyword: spec}, **options)[start_keyword]
+
+
+# Department blocks of the 'Internal exits' sheet, shared by the dashboard and the
+# Excel Generator. as_title: the exit-type summary above the department tables
+# also has a "Disciplinary dismissal" row.
+EXIT_BLOCK_SPECS = {
+    'Voluntary': {'keyword': "Voluntary exit per Department", 'col_mapping': ['Department', 'Count']},
+    'Dismissal': {'keyword': "Disciplinary dismissal", 'col_mapping': ['Department', 'Count'],
+                  'as_title': True},
+}
+
+
+# --- STREAMING EXTRACTION ---
+# For exports too large to hold as a DataFrame: rows are consumed one at a time
+# and only the rows of the tables being extracted are kept, so peak memory is
+# bounded by the largest extracted table. Same rules as SheetIndex.extract.
+
+
+def _is_blank(value):
+    return value is None or value == '' or (isinstance(value, float) and value != value)
+
+
+def stream_messy_tables(rows, specs, skip_blank_rows=False, align_to_header=False):
+    """Extracts the tables in specs from an iterable of row tuples.
+
+    Stops reading as soon as every table has ended. Returns the same
+    {name: DataFrame} as SheetIndex.extract_many. For 'as_title' specs a title
+    is a matching cell whose cell in the previous row is empty (the streaming
+    reader cannot look at neighbours the way SheetIndex.blocks does).
+    """
+    pending = dict(specs)
+    state = {name: {'phase': 'seek', 'header': None, 'index': [], 'body': []} for name in specs}
+
+    prev_row = []
+    for i, row in enumerate(rows):
+        row = [np.nan if _is_blank(v) else v for v in row]
+        row_empty = all(isinstance(v, float) and v != v for v in row)
+        row_text = None
+        for name in list(pending):
+            spec, st = pending[name], state[name]
+            if st['phase'] == 'seek':
+                if row_empty:
+                    continue
+                if row_text is None:
+                    row_text = ['' if isinstance(v, float) and v != v else str(v).lower() for v in row]
+                keyword = spec['keyword'].lower()
+                if any(keyword in cell and not (spec.get('as_title') and j < len(prev_row)
+                                                and not _is_blank(prev_row[j]))
+                       for j, cell in enumerate(row_text)):
+                    st['phase'] = 'header'
+            elif st['phase'] == 'header':
+                st['header'] = row
+                st['phase'] = 'body'
+            else:
+                if skip_blank_rows and row_empty:
+                    continue
+                first = row[0] if row else np.nan
+                first_blank = isinstance(first, float) and first != first
+                if first_blank or (spec.get('stop_at_total', True) and str(first).lower() == 'total'):
+                    del pending[name]
+                    continue
+                st['index'].append(i)
+                st['body'].append(row)
+        if not pending:
+            break
+        prev_row = row
+
+    tables = {}
+    for name, spec in specs.items():
+        st = state[name]
+        if not st['body']:
+            tables[name] = pd.DataFrame()
+            continue
+        width = max(len(st['header']), max(len(r) for r in st['body']))
+        header = st['header'] + [np.nan] * (width - len(st['header']))
+        body = [r + [np.nan] * (width - len(r)) for r in st['body']]
+        extracted_df = pd.DataFrame(body, index=st['index'], dtype=object).infer_objects()
+        extracted_df = _label_columns(extracted_df, header, pd.isna(np.array(header, dtype=object)),
+                                      spec.get('col_mapping'), align_to_header)
+        tables[name] = extracted_df
+    return tables
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+# --- PERSISTENT PARSE CACHE ---
+# Parsed DataFrames are stored as Parquet under CACHE_DIR/<namespace>/<key>/.
+# The key hashes the content, size and mtime of every source workbook plus the
+# parser version, so editing a workbook (or the parsing code, via the version)
+# invalidates the entry automatically. Survives restarts and redeploys, unlike
+# st.cache_data which only lives as long as the process.
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.parsed_cache')
+MANIFEST_NAME = 'manifest.json'
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(paths, parser_version):
+    """Key over (name, size, mtime, content hash) of each source file and the parser version."""
+    digest = hashlib.sha256(f"parser={parser_version}".encode())
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"|{os.path.basename(path)}|{stat.st_size}|{stat.st_mtime_ns}|".encode())
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()[:32]
+
+
+def load_frames(namespace, key):
+    """Returns the cached {name: DataFrame} for key, or None on a miss."""
+    entry_dir = os.path.join(CACHE_DIR, namespace, key)
+    manifest_path = os.path.join(entry_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, encoding='utf-8') as fh:
+            names = json.load(fh)['frames']
+        return {name: pd.read_parquet(os.path.join(entry_dir, f"{name}.parquet")) for name in names}
+    except Exception as e:
+        print(f"Cache read failed ({e}); re-parsing.")
+        return None
+
+
+def store_frames(namespace, key, frames):
+    """Writes frames under key and drops older entries of the same namespace.
+
+    The entry is written to a temporary directory first and renamed into
+    place, so a crash mid-write never leaves a half-populated entry behind.
+    Frames that Parquet cannot represent (e.g. non-string column labels) leave
+    the cache untouched.
+    """
+    namespace_dir = os.path.join(CACHE_DIR, namespace)
+    os.makedirs(namespace_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=namespace_dir)
+    try:
+        for name, df in frames.items():
+            df.to_parquet(os.path.join(tmp_dir, f"{name}.parquet"))
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as fh:
+            json.dump({'key': key, 'frames': list(frames)}, fh)
+        entry_dir = os.path.join(namespace_dir, key)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+    except Exception as e:
+        print(f"Cache write skipped: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+    for stale in os.listdir(namespace_dir):
+        if stale != key and not stale.startswith('.tmp-'):
+            shutil.rmtree(os.path.join(namespace_dir, stale), ignore_errors=True)
+    return True
+
+
+def apply_dtypes(frames, dtypes):
+    """Casts every column named in dtypes, in every frame that has it, to its dtype."""
+    for df in frames.values():
+        for col in df.columns.intersection(list(dtypes)):
+            df[col] = df[col].astype(dtypes[col])
+    return frames
+
+
+def cached_parse(namespace, paths, parse_func, parser_version, dtypes=None):
+    """Returns parse_func() from the on-disk cache, parsing and storing it on a miss.
+
+    Parquet does not keep a categorical's full category list, so dtypes
+    (column name -> dtype) is re-applied to frames loaded from the cache;
+    cached and fresh parses then have the same dtypes.
+    """
+    key = cache_key(paths, parser_version)
+    frames = load_frames(namespace, key)
+    if frames is None:
+        frames = parse_func()
+        store_frames(namespace, key, frames)
+    elif dtypes:
+        apply_dtypes(frames, dtypes)
+    return frames
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# --- ROLLING TURNOVER & RETENTION ---
+# Trailing 3/6/12-month metrics for every month at once. Window edges are
+# computed as (windows x months) arrays; average, opening and closing headcount
+# come from one HeadcountIndex query each, and rolling exits are differences of
+# a cumulative sum over the monthly exit counts of the ExitEventStore.
+
+WINDOWS = (3, 6, 12)
+
+
+def metric_months(hc_index):
+    """Calendar months covered by the headcount snapshots."""
+    if not len(hc_index):
+        return pd.PeriodIndex([], freq='M')
+    return pd.period_range(pd.Timestamp(hc_index.dates[0]), pd.Timestamp(hc_index.dates[-1]), freq='M')
+
+
+def _window_edges(months, windows):
+    """(windows, months) arrays of window start and exclusive end as datetime64[ns]."""
+    ordinals = months.asi8[None, :]
+    sizes = np.asarray(windows)[:, None]
+    starts = (ordinals - sizes + 1).astype('datetime64[M]').astype('datetime64[ns]')
+    ends = np.broadcast_to((ordinals + 1).astype('datetime64[M]').astype('datetime64[ns]'), starts.shape)
+    return starts, ends
+
+
+def _rolling_sums(monthly, windows):
+    """Trailing sums over each window for every month: (months, ...) -> (windows, months, ...)."""
+    cumulative = np.concatenate([np.zeros_like(monthly[:1]), np.cumsum(monthly, axis=0)])
+    month_idx = np.arange(len(monthly))[None, :] + 1
+    lo = np.maximum(month_idx - np.asarray(windows)[:, None], 0)
+    return cumulative[month_idx] - cumulative[lo]
+
+
+def _monthly_exits(events, months):
+    """Exit counts per (month, entity, department, exit type) from the event store."""
+    return events.window_counts(months.start_time, months.end_time.normalize())
+
+
+def _long_frame(months, windows, names, name_col, columns):
+    n_windows, n_months, n_names = len(windows), len(months), len(names)
+    frame = pd.DataFrame({
+        'Month': np.tile(np.repeat(months.start_time, n_names), n_windows),
+        'Window': np.repeat(np.asarray(windows), n_months * n_names),
+        name_col: np.tile(np.asarray(names, dtype=object), n_windows * n_months),
+    })
+    for col, values in columns.items():
+        frame[col] = np.asarray(values, dtype=float).ravel()
+    return frame
+
+
+def rolling_entity_metrics(hc_index, groups, events=None, windows=WINDOWS):
+    """Trailing-window headcount metrics per group (plus 'Total') for every month.
+
+    groups maps a name to the headcount columns it sums. Returns a long frame
+    Month / Window / Group with Avg_HC, Opening_HC, Closing_HC, Net_Change and,
+    when events (ExitEventStore) are given, Exits, Turnover (exits / average
+    headcount) and Retention (1 - exits / opening headcount). An event entity
+    counts towards the group it names or whose columns include it, and towards
+    'Total' only if it belongs to some group. Windows starting before the month
+    of the first snapshot are left out.
+    """
+    months = metric_months(hc_index)
+    names = list(groups) + ['Total']
+    if not len(months):
+        return pd.DataFrame(columns=['Month', 'Window', 'Group', 'Avg_HC', 'Opening_HC', 'Closing_HC', 'Net_Change'])
+    members = np.array([[c in cols for cols in groups.values()] for c in hc_index.columns], dtype=float)
+    membership = np.hstack([members, members.any(axis=1, keepdims=True)])
+
+    starts, ends = _window_edges(months, windows)
+    flat_starts, flat_ends = starts.ravel(), ends.ravel()
+    shape = (len(windows), len(months), len(names))
+    avg = (hc_index.averages(flat_starts, flat_ends - np.timedelta64(1, 'D')).to_numpy() @ membership).reshape(shape)
+    opening = (hc_index.at(flat_starts) @ membership).reshape(shape)
+    closing = (hc_index.at(flat_ends) @ membership).reshape(shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        columns = {
+            'Avg_HC': avg,
+            'Opening_HC': opening,
+            'Closing_HC': closing,
+            'Net_Change': np.where(opening > 0, closing / opening - 1, np.nan),
+        }
+        if events is not None:
+            monthly = _monthly_exits(events, months).sum(axis=(2, 3))
+            entity_members = np.array([[e == g or e in cols for g, cols in groups.items()]
+                                       for e in events.entities], dtype=bool).reshape(len(events.entities), -1)
+            # 'Total' takes the same entities as its headcount: those belonging to some group
+            entity_groups = np.hstack([entity_members, entity_members.any(axis=1, keepdims=True)]).astype(float)
+            exits = _rolling_sums(monthly @ entity_groups, windows)
+            columns['Exits'] = exits
+            columns['Turnover'] = np.where(avg > 0, exits / avg, np.nan)
+            columns['Retention'] = np.where(opening > 0, np.clip(1 - exits / opening, 0, 1), np.nan)
+
+    frame = _long_frame(months, windows, names, 'Group', columns)
+    complete = np.repeat(starts.ravel() >= hc_index.dates[0].astype('datetime64[M]'), len(names))
+    return frame[complete].reset_index(drop=True)
+
+
+def rolling_department_exits(events, months, windows=WINDOWS):
+    """Trailing-window exits per department and their share of all exits in the window.
+
+    The workbooks hold no headcount per department, so department rates are
+    expressed as shares of the window's exits. As for the entity metrics,
+    windows starting before the first of months are left out.
+    """
+    if events is None or not len(months):
+        return pd.DataFrame(columns=['Month', 'Window', 'Department', 'Exits', 'Share'])
+    monthly = _monthly_exits(events, months).sum(axis=(1, 3))
+    exits = _rolling_sums(monthly, windows)
+    totals = exits.sum(axis=2, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share = np.where(totals > 0, exits / totals, np.nan)
+    departments = list(events.departments)
+    frame = _long_frame(months, windows, departments, 'Department', {'Exits': exits, 'Share': share})
+    complete = np.arange(len(months))[None, :] + 1 >= np.asarray(windows)[:, None]
+    return frame[np.repeat(complete.ravel(), len(departments))].reset_index(drop=True)
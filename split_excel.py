@@ -1,35 +1,317 @@
-
-import pandas as pd
 import os
 import glob
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from parsed_cache import file_digest
+from workbooks import WorkbookReader
+
+# specific directory (PEOPLEMETRICS_DATA_DIR overrides it, as for the Excel Generator)
+TARGET_DIR = os.environ.get('PEOPLEMETRICS_DATA_DIR', r"C:\Users\ÍtaloMarquesMouzinho\.antigravity\PeopleMetrics")
+
+# Written next to the CSVs: per workbook its size, mtime and content hash, and
+# per sheet the hash of its current data plus the hash each output format was
+# last written from, so later runs only touch what changed and readers can tell
+# a fresh output from a stale one.
+MANIFEST_NAME = '.split_manifest.json'
+MANIFEST_VERSION = 2
+
+def find_workbooks(target_dir):
+    """All *.xlsx in target_dir, skipping Excel '~$' lock files."""
+    xlsx_files = glob.glob(os.path.join(target_dir, "*.xlsx"))
+    return [f for f in xlsx_files if not os.path.basename(f).startswith('~$')]
+
+# CSV stays the default for people who open the exports by hand; Parquet and
+# Feather keep typed columns for programmatic consumers (Excel Generator).
+OUTPUT_FORMATS = ('csv', 'parquet', 'feather')
+
+def output_path_for(target_dir, file_path, sheet_name, fmt):
+    return os.path.join(target_dir, f"{os.path.basename(file_path)} - {sheet_name}.{fmt}")
+
+def typed_columns(df):
+    """Copy of df with typed columns for the columnar formats.
+
+    Numeric text becomes numbers, integral columns become int64 (Int64 when
+    they have gaps), datetime objects become datetime64, and remaining mixed
+    columns become strings. Column labels are stringified.
+    """
+    out = df.copy()
+    out.columns = [str(c) for c in out.columns]
+    for col in out.columns:
+        s = out[col]
+        if s.dtype == object or pd.api.types.is_string_dtype(s.dtype):
+            non_null = s.dropna()
+            kind = pd.api.types.infer_dtype(non_null, skipna=True)
+            if non_null.empty:
+                s = s.astype('float64')
+            elif kind in ('datetime', 'datetime64', 'date'):
+                s = pd.to_datetime(s, errors='coerce')
+            elif pd.to_numeric(non_null, errors='coerce').notna().all():
+                s = pd.to_numeric(s, errors='coerce')
+            else:
+                s = s.where(s.isna(), s.astype(str))
+        if pd.api.types.is_float_dtype(s.dtype):
+            values = s.to_numpy()
+            finite = values[~np.isnan(values)]
+            if len(finite) and np.all(finite == np.round(finite)) and np.all(np.abs(finite) < 2 ** 53):
+                s = s.astype('int64') if len(finite) == len(values) else s.astype('Int64')
+        out[col] = s
+    return out
+
+# --- MANIFEST ---
+def load_manifest(target_dir):
+    """The manifest of target_dir; missing, unreadable or older-version manifests read as empty."""
+    path = os.path.join(target_dir, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'workbooks': {}}
+    return manifest
+
+def save_manifest(target_dir, manifest):
+    manifest = {**manifest, 'version': MANIFEST_VERSION}
+    path = os.path.join(target_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def is_fresh(sheet_entry, fmt):
+    """Whether fmt was last written from the sheet's current data."""
+    return bool(sheet_entry) and sheet_entry['formats'].get(fmt) == sheet_entry['digest']
+
+def check_workbook(file_path, target_dir, previous, formats=('csv',)):
+    """Returns (entry, unchanged) for a workbook against its previous manifest entry.
+
+    Size and mtime are compared first; the content is only hashed when they
+    differ, so a touched-but-identical file is still recognised as unchanged.
+    A workbook is only unchanged if every requested format of every sheet was
+    written from the sheet's current data.
+    """
+    stat = os.stat(file_path)
+    entry = {'path': file_path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+             'sheets': dict(previous.get('sheets', {})) if previous else {}}
+    if previous and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+        entry['sha256'] = previous['sha256']
+    else:
+        entry['sha256'] = file_digest(file_path)
+    unchanged = (previous is not None and previous.get('sha256') == entry['sha256']
+                 and all(is_fresh(sheet, fmt) and os.path.exists(output_path_for(target_dir, file_path, s, fmt))
+                         for s, sheet in entry['sheets'].items() for fmt in formats))
+    return entry, unchanged
 
-# specific directory
-TARGET_DIR = r"C:\Users\ÍtaloMarquesMouzinho\.antigravity\PeopleMetrics"
+def write_sheet(df, output_paths, previous):
+    """Writes df in every requested format not already written from the same content.
 
-def process_excel_files():
-    # Find all xlsx files in the target directory
-    print(f"Target Directory: {TARGET_DIR}")
-    xlsx_path = os.path.join(TARGET_DIR, "*.xlsx")
-    xlsx_files = glob.glob(xlsx_path)
-    
+    output_paths maps a format ('csv', 'parquet', 'feather') to its path;
+    previous is the sheet's manifest entry ({'digest', 'formats'}) or None.
+    The digest is taken over the CSV rendering, so it does not depend on the
+    formats requested. Returns (sheet_entry, written) with the updated
+    manifest entry and whether any file was written.
+    """
+    csv_text = df.to_csv(index=False)
+    digest = hashlib.sha256(csv_text.encode('utf-8')).hexdigest()
+    formats = dict(previous['formats']) if previous else {}
+    stale = {fmt: path for fmt, path in output_paths.items()
+             if formats.get(fmt) != digest or not os.path.exists(path)}
+    typed = None
+    for fmt, path in stale.items():
+        if fmt == 'csv':
+            with open(path, 'w', encoding='utf-8', newline='') as fh:
+                fh.write(csv_text)
+            continue
+        if typed is None:
+            typed = typed_columns(df)
+        if fmt == 'parquet':
+            typed.to_parquet(path, index=False)
+        else:
+            typed.reset_index(drop=True).to_feather(path)
+        formats[fmt] = digest
+    return {'digest': digest, 'formats': formats}, bool(stale)
+
+def fresh_output(target_dir, file_path, sheet_name, preference=('parquet', 'feather', 'csv')):
+    """Path of the first format in preference written from the sheet's current data, or None.
+
+    Sheets without a manifest entry (CSVs written by other tools) fall back to
+    the CSV if it exists; columnar files are only trusted through the manifest.
+    """
+    entry = load_manifest(target_dir)['workbooks'].get(os.path.basename(file_path), {})
+    sheet = entry.get('sheets', {}).get(sheet_name)
+    candidates = [fmt for fmt in preference if is_fresh(sheet, fmt)] if sheet else ['csv']
+    for fmt in candidates:
+        path = output_path_for(target_dir, file_path, sheet_name, fmt)
+        if os.path.exists(path):
+            return path
+    return None
+
+# --- PROCESS-POOL WORKER ---
+# Each worker keeps the workbook it last read open, so consecutive sheets of the
+# same file handed to the same worker do not re-open the archive.
+_worker_reader = None
+_worker_file = None
+
+def output_paths_for(target_dir, file_path, sheet_name, formats):
+    return {fmt: output_path_for(target_dir, file_path, sheet_name, fmt) for fmt in formats}
+
+def _export_sheet(file_path, sheet_name, target_dir, formats, previous):
+    global _worker_reader, _worker_file
+    if _worker_reader is None:
+        _worker_reader = WorkbookReader()
+    if file_path != _worker_file:
+        _worker_reader.close()
+        _worker_file = file_path
+    start = time.perf_counter()
+    try:
+        df = _worker_reader.read(file_path, sheet_name)
+        sheet_entry, written = write_sheet(df, output_paths_for(target_dir, file_path, sheet_name, formats),
+                                           previous)
+        return file_path, sheet_name, time.perf_counter() - start, sheet_entry, written, None
+    except Exception as e:
+        return file_path, sheet_name, time.perf_counter() - start, None, False, str(e)
+
+def _new_summary(file_path):
+    return {'file': os.path.basename(file_path), 'sheets': 0, 'unchanged': 0,
+            'skipped': False, 'seconds': 0.0, 'errors': []}
+
+def _record_sheet(summary_entry, manifest_entry, sheet_name, sheet_entry, written):
+    manifest_entry['sheets'][sheet_name] = sheet_entry
+    if written:
+        summary_entry['sheets'] += 1
+    else:
+        summary_entry['unchanged'] += 1
+
+def _export_serial(entries, target_dir, summary, formats):
+    with WorkbookReader() as reader:
+        for file_path, entry in entries.items():
+            filename = os.path.basename(file_path)
+            print(f"Processing {filename}...")
+            start = time.perf_counter()
+            try:
+                # All sheets come from a single open of the workbook
+                sheets = reader.read_many(file_path)
+                entry['sheets'] = {s: entry['sheets'].get(s) for s in sheets}
+                for sheet_name, df in sheets.items():
+                    sheet_entry, written = write_sheet(df, output_paths_for(target_dir, file_path, sheet_name,
+                                                                            formats), entry['sheets'][sheet_name])
+                    _record_sheet(summary[file_path], entry, sheet_name, sheet_entry, written)
+                    if written:
+                        print(f"  Created: {filename} - {sheet_name} ({', '.join(formats)})")
+            except Exception as e:
+                summary[file_path]['errors'].append(str(e))
+                print(f"  Error processing {filename}: {e}")
+            finally:
+                reader.close()
+            summary[file_path]['seconds'] = time.perf_counter() - start
+
+def _export_parallel(entries, target_dir, summary, formats, workers):
+    tasks = []
+    with WorkbookReader() as reader:
+        for file_path, entry in entries.items():
+            try:
+                sheet_names = reader.sheet_names(file_path)
+                entry['sheets'] = {s: entry['sheets'].get(s) for s in sheet_names}
+                tasks += [(file_path, sheet) for sheet in sheet_names]
+            except Exception as e:
+                summary[file_path]['errors'].append(str(e))
+            finally:
+                reader.close()
+
+    # Sheets of the same file are submitted together so workers tend to reuse handles
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_export_sheet, file_path, sheet, target_dir, formats,
+                               entries[file_path]['sheets'][sheet])
+                   for file_path, sheet in tasks]
+        for future in as_completed(futures):
+            file_path, sheet_name, seconds, sheet_entry, written, error = future.result()
+            summary[file_path]['seconds'] += seconds
+            if error:
+                summary[file_path]['errors'].append(f"{sheet_name}: {error}")
+            else:
+                _record_sheet(summary[file_path], entries[file_path], sheet_name, sheet_entry, written)
+
+def print_summary(summary, elapsed):
+    entries = list(summary.values())
+    total_sheets = sum(e['sheets'] for e in entries)
+    skipped = sum(e['skipped'] for e in entries)
+    failed = [e for e in entries if e['errors']]
+    print(f"\nSummary: {len(entries)} files ({skipped} unchanged), {total_sheets} sheets written, "
+          f"{len(failed)} files with failures, {elapsed:.2f}s total")
+    for e in sorted(entries, key=lambda e: -e['seconds']):
+        if e['errors']:
+            status = f"FAILED ({len(e['errors'])})"
+        else:
+            status = 'SKIPPED (unchanged)' if e['skipped'] else 'OK'
+        print(f"  {e['file']:<50} {e['sheets']:>4} written {e['unchanged']:>4} same "
+              f"{e['seconds']:>8.2f}s  {status}")
+        for error in e['errors']:
+            print(f"      - {error}")
+
+def process_excel_files(target_dir=TARGET_DIR, workers=1, force=False, formats=('csv',)):
+    """Exports every sheet of every workbook in target_dir to '<file> - <sheet>.<format>'.
+
+    Workbooks whose content matches the manifest are skipped, and within a
+    changed workbook only outputs not yet written from the sheet's current
+    data are rewritten (force=True rewrites everything). formats is any of OUTPUT_FORMATS;
+    'csv' is the default. With workers > 1 the (file, sheet) pairs
+    are fanned out over a process pool. Returns the per-file summary; with
+    workers > 1 seconds is the summed per-sheet worker time.
+    """
+    print(f"Target Directory: {target_dir}")
+    xlsx_files = find_workbooks(target_dir)
     print(f"Found files: {xlsx_files}")
 
+    manifest = {'workbooks': {}} if force else load_manifest(target_dir)
+    previous = manifest.get('workbooks', {})
+    summary = {file_path: _new_summary(file_path) for file_path in xlsx_files}
+    start = time.perf_counter()
+
+    entries, to_export = {}, {}
     for file_path in xlsx_files:
-        filename = os.path.basename(file_path)
-        if filename.startswith('~$'): continue 
-        
-        print(f"Processing {filename}...")
-        try:
-            xls = pd.ExcelFile(file_path)
-            for sheet_name in xls.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                # Construct CSV string
-                csv_filename = f"{filename} - {sheet_name}.csv"
-                output_path = os.path.join(TARGET_DIR, csv_filename)
-                df.to_csv(output_path, index=False)
-                print(f"  Created: {csv_filename}")
-        except Exception as e:
-            print(f"  Error processing {filename}: {e}")
+        entry, unchanged = check_workbook(file_path, target_dir, previous.get(os.path.basename(file_path)),
+                                          formats)
+        entries[file_path] = entry
+        if unchanged:
+            summary[file_path]['skipped'] = True
+            summary[file_path]['unchanged'] = len(entry['sheets'])
+        else:
+            to_export[file_path] = entry
+
+    if workers > 1:
+        _export_parallel(to_export, target_dir, summary, formats, workers)
+    else:
+        _export_serial(to_export, target_dir, summary, formats)
+
+    # Failed workbooks keep their previous entry so the next run retries them
+    new_workbooks = {}
+    for file_path, entry in entries.items():
+        name = os.path.basename(file_path)
+        if summary[file_path]['errors']:
+            if name in previous:
+                new_workbooks[name] = previous[name]
+        else:
+            new_workbooks[name] = entry
+    save_manifest(target_dir, {'workbooks': new_workbooks})
+
+    print_summary(summary, time.perf_counter() - start)
+    return summary
 
 if __name__ == "__main__":
-    process_excel_files()
+    parser = argparse.ArgumentParser(description="Export every sheet of every workbook to CSV.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Process-pool size; >1 converts (file, sheet) pairs in parallel")
+    parser.add_argument('--target-dir', default=TARGET_DIR)
+    parser.add_argument('--force', action='store_true',
+                        help="Ignore the manifest and rewrite every output")
+    parser.add_argument('--format', dest='formats', nargs='+', choices=OUTPUT_FORMATS, default=['csv'],
+                        help="One or more output formats (default: csv)")
+    args = parser.parse_args()
+    process_excel_files(args.target_dir, args.workers, args.force, tuple(args.formats))
@@ -1,8 +1,25 @@
+import hashlib
+import os
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from parsed_cache import cached_parse
+from messy_tables import EXIT_BLOCK_SPECS
+from workbooks import WorkbookReader
+from aggregates import AggregateCube, headcount_by_period
+from exit_events import (EVENT_SHEET, ExitEventStore, classify_exit_types, normalize_events,
+                         parse_exit_type_summary)
+from headcount_index import HeadcountIndex
+from survival import PROBATION_MONTHS, event_survival, probation_cliff
+from rolling_metrics import WINDOWS, metric_months, rolling_department_exits, rolling_entity_metrics
+from timeseries import choose_frequency, downsample, resample_extremes
+from forecast import SIMULATION_MONTHS, SIMULATION_PATHS, parse_turnover_rates, simulate_bands
+from department_taxonomy import EXIT_TYPE_DTYPE, TAXONOMY_FILE, shared_dtypes, unify_departments, unmapped_labels
+
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
     page_title="TalentIntel 2025",
@@ -110,97 +127,72 @@ st.markdown(f"""
 # DATA PARSING HELPERS
 # ============================================================
 
-def parse_messy_table(df, start_keyword, end_condition_func, col_mapping=None):
-    if df.empty:
-        return pd.DataFrame()
-    mask = df.apply(lambda row: row.astype(str).str.contains(start_keyword, case=False, na=False).any(), axis=1)
-    start_idx = df[mask].index
-    if len(start_idx) == 0:
-        return pd.DataFrame()
-    header_row_idx = start_idx[0] + 1
-    if header_row_idx >= len(df):
-        return pd.DataFrame()
-    header_row = df.iloc[header_row_idx]
-    data_rows = []
-    for i in range(header_row_idx + 1, len(df)):
-        row = df.iloc[i]
-        if row.isna().all():
-            continue
-        if end_condition_func(row):
-            break
-        data_rows.append(row)
-    if not data_rows:
-        return pd.DataFrame()
-    extracted_df = pd.DataFrame(data_rows)
-    if col_mapping:
-        actual_start_col = 0
-        for col in range(header_row.shape[0]):
-            if pd.notna(header_row.iloc[col]):
-                actual_start_col = col
-                break
-        extracted_df = extracted_df.iloc[:, actual_start_col: actual_start_col + len(col_mapping)]
-        if extracted_df.shape[1] == len(col_mapping):
-            extracted_df.columns = col_mapping
-    else:
-        if extracted_df.shape[1] == len(header_row):
-            extracted_df.columns = header_row
-    return extracted_df
-
-
 def normalize_departments(df, col_name):
     if df.empty or col_name not in df.columns:
         return df
-    mapping = {
-        'CUSTOMER SERVICE': 'Customer Service', 'CS': 'Customer Service',
-        'PROJECT/PRODUCT': 'Product', 'Project/ Product': 'Product',
-        'IT - DEVELOPER': 'Tech & IT', 'IT - BACKOFFICE': 'Tech & IT',
-        'IT - UIUX': 'Tech & IT', 'IT - FRONT': 'Tech & IT',
-        'IT ': 'Tech & IT', 'IT': 'Tech & IT',
-        'HR-CORPORATE': 'HR', 'HR': 'HR',
-        'Finance, Legal and Payments': 'Finance/Legal',
-        'ACCOUNTING': 'Finance/Legal', 'TAX': 'Finance/Legal', 'PAYMENTS': 'Finance/Legal',
-        'PAID MARKETING': 'Marketing', 'ORGANIC MARKETING': 'Marketing', 'SEO': 'Marketing',
-        'DBI': 'Data & BI'
-    }
-    df['Dept_Unified'] = df[col_name].map(mapping).fillna('Other')
+    df['Dept_Unified'] = unify_departments(df[col_name])
     return df
 
 
+# Workbooks are read from the working directory unless PEOPLEMETRICS_DATA_DIR
+# points elsewhere (e.g. at synthetic_workbooks.py output)
+DATA_DIR = os.environ.get('PEOPLEMETRICS_DATA_DIR', '')
+HC_FILE = os.path.join(DATA_DIR, 'Headcount Evolution 2022-2026.xlsx')
+EXITS_FILE = os.path.join(DATA_DIR, '2025.xlsx')
+PARSER_VERSION = 7  # bump whenever parsing below changes, to invalidate the on-disk cache
+
+
+def parse_workbooks():
+    result = {}
+    with WorkbookReader() as reader:
+        df_hc = reader.read_table(HC_FILE, 'Hoja 1')
+        exit_tables = reader.read_tables(EXITS_FILE, 'Internal exits', EXIT_BLOCK_SPECS,
+                                         skip_blank_rows=True, align_to_header=True)
+        # The department tables leave out objective and before-probation exits; totals come from here
+        exit_types = parse_exit_type_summary(reader.read(EXITS_FILE, 'Internal exits', header=None))
+        df_train = reader.read_tables(EXITS_FILE, 'Training investment', {
+            'training': {'keyword': "Training investment by department",
+                         'col_mapping': ['Department', 'Investment', 'Hours']},
+        }, skip_blank_rows=True, align_to_header=True)['training']
+        turnover = parse_turnover_rates(reader.read(EXITS_FILE, 'TurnoverRetention', header=None))
+        # Optional per-leaver records; the aggregated blocks above are the fallback
+        df_events = (reader.read_table(EXITS_FILE, EVENT_SHEET)
+                     if EVENT_SHEET in reader.sheet_names(EXITS_FILE) else pd.DataFrame())
+
+    df_hc['Fecha'] = pd.to_datetime(df_hc['Fecha'])
+    df_hc = df_hc.sort_values('Fecha')
+    for c in ['Leadtech', 'Randstad', 'Deel', 'Freelance']:
+        if c in df_hc.columns:
+            df_hc[c] = df_hc[c].fillna(0)
+    result['hc'] = df_hc
+
+    for exit_type, df_block in exit_tables.items():
+        df_block['Type'] = exit_type
+    df_exits = pd.concat(exit_tables.values())
+    df_exits['Count'] = pd.to_numeric(df_exits['Count'], errors='coerce').fillna(0)
+    df_exits['Type'] = df_exits['Type'].astype(EXIT_TYPE_DTYPE)
+    result['exits_dept'] = normalize_departments(df_exits, 'Department')
+    result['exit_types'] = exit_types.rename_axis('Label').reset_index(name='Count')
+
+    df_train['Investment'] = pd.to_numeric(df_train['Investment'], errors='coerce').fillna(0)
+    result['training'] = normalize_departments(df_train, 'Department')
+
+    result['turnover'] = turnover.rename_axis('Entity').reset_index(name='Annual_Turnover')
+    result['exit_events'] = normalize_events(df_events)
+    return result
+
+
 @st.cache_data
 def load_and_process_data():
-    result = {}
     try:
-        hc_file = 'Headcount Evolution 2022-2026.xlsx'
-        df_hc = pd.read_excel(hc_file, sheet_name='Hoja 1')
-        df_hc['Fecha'] = pd.to_datetime(df_hc['Fecha'])
-        df_hc = df_hc.sort_values('Fecha')
-        for c in ['Leadtech', 'Randstad', 'Deel', 'Freelance']:
-            if c in df_hc.columns:
-                df_hc[c] = df_hc[c].fillna(0)
-        result['hc'] = df_hc
-
-        exits_file = '2025.xlsx'
-        df_exits_raw = pd.read_excel(exits_file, sheet_name='Internal exits', header=None)
-        df_vol = parse_messy_table(df_exits_raw, "Voluntary exit per Department",
-                                   lambda r: pd.isna(r[0]) or str(r[0]).lower() == 'total',
-                                   col_mapping=['Department', 'Count'])
-        df_vol['Type'] = 'Voluntary'
-        df_dis = parse_messy_table(df_exits_raw, "Disciplinary dismissal",
-                                   lambda r: pd.isna(r[0]) or str(r[0]).lower() == 'total',
-                                   col_mapping=['Department', 'Count'])
-        df_dis['Type'] = 'Dismissal'
-        df_exits = pd.concat([df_vol, df_dis])
-        df_exits['Count'] = pd.to_numeric(df_exits['Count'], errors='coerce').fillna(0)
-        result['exits_dept'] = normalize_departments(df_exits, 'Department')
-
-        df_train_raw = pd.read_excel(exits_file, sheet_name='Training investment', header=None)
-        df_train = parse_messy_table(df_train_raw, "Training investment by department",
-                                     lambda r: pd.isna(r[0]) or str(r[0]).lower() == 'total',
-                                     col_mapping=['Department', 'Investment', 'Hours'])
-        df_train['Investment'] = pd.to_numeric(df_train['Investment'], errors='coerce').fillna(0)
-        result['training'] = normalize_departments(df_train, 'Department')
-
-        return result
+        data = cached_parse('dashboard', [HC_FILE, EXITS_FILE, TAXONOMY_FILE], parse_workbooks, PARSER_VERSION,
+                            dtypes=shared_dtypes())
+        # Summed once here; sidebar filters only slice it
+        data['cube'] = AggregateCube(data['exits_dept'], data['training'], data['hc'])
+        data['events'] = ExitEventStore(data['exit_events']) if not data['exit_events'].empty else None
+        data['hc_index'] = HeadcountIndex(data['hc'])
+        data['views'] = derive_views(data)
+        return data
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return None
@@ -210,29 +202,24 @@ def load_and_process_data():
 # REFERENCE DATA (from presentation / HTML)
 # ============================================================
 
-HEADCOUNT_TREND = [
-    {"date": "Mar 22", "Internal": 419, "Agency": 18, "Deel": 4},
-    {"date": "Sep 22", "Internal": 522, "Agency": 44, "Deel": 2},
-    {"date": "Mar 23", "Internal": 566, "Agency": 22, "Deel": 15},
-    {"date": "Sep 23", "Internal": 588, "Agency": 36, "Deel": 25},
-    {"date": "Jun 24", "Internal": 650, "Agency": 50, "Deel": 35},
-    {"date": "Apr 25", "Internal": 707, "Agency": 64, "Deel": 33},
-    {"date": "Oct 25", "Internal": 769, "Agency": 90, "Deel": 67},
-    {"date": "Jan 26", "Internal": 684, "Agency": 53, "Deel": 50},
-]
+# Entity columns of the headcount export behind each series of the velocity chart
+HEADCOUNT_GROUPS = {
+    "Internal": ["Leadtech", "China"],
+    "Agency":   ["Randstad", "Zemsania", "Outvise&Capitole&Izertis&Ox"],
+    "Deel":     ["Deel"],
+}
 
-RISK_MATRIX = [
-    {"name": "Customer Service", "investment": 11382, "voluntary": 29, "dismissal": 51, "totalExits": 80,  "headcount": 145, "color": PINK},
-    {"name": "Product",          "investment": 10081, "voluntary": 12, "dismissal": 25, "totalExits": 37,  "headcount": 85,  "color": YELLOW},
-    {"name": "Tech & IT",        "investment": 29500, "voluntary": 8,  "dismissal": 20, "totalExits": 28,  "headcount": 230, "color": GREEN},
-    {"name": "Data & BI",        "investment": 6213,  "voluntary": 2,  "dismissal": 5,  "totalExits": 7,   "headcount": 45,  "color": PURPLE},
-    {"name": "Marketing",        "investment": 6855,  "voluntary": 4,  "dismissal": 2,  "totalExits": 6,   "headcount": 55,  "color": BLUE},
-]
+# The workbooks carry no headcount per department, so risk-matrix bubbles are
+# sized from these reference figures (median size for unlisted departments).
+DEPARTMENT_HEADCOUNT = {"Customer Service": 145, "Product": 85, "Tech & IT": 230, "Data & BI": 45, "Marketing": 55}
 
-EXIT_TYPE_DATA = [
-    {"name": "Voluntary", "value": 55, "color": PURPLE},
-    {"name": "Involuntary (Dismissal)", "value": 103, "color": PINK},
-]
+# Donut slices per raw label of the exit-type summary
+EXIT_TYPE_COLORS = {"Voluntary exit": PURPLE, "Disciplinary dismissal": PINK, "Objective dismissal": YELLOW,
+                    "Dismissal": PINK}
+
+DEPARTMENT_COLORS = {"Customer Service": PINK, "Product": YELLOW, "Tech & IT": GREEN,
+                     "Data & BI": PURPLE, "Marketing": BLUE}
+PALETTE = [PINK, PURPLE, BLUE, GREEN, YELLOW]
 
 STRATEGY_CARDS = [
     {
@@ -286,6 +273,400 @@ STRATEGY_CARDS = [
 ]
 
 
+
+# ============================================================
+# DERIVED VIEWS
+# ============================================================
+
+def derive_views(data):
+    """Chart inputs computed from the parsed frames.
+
+    Called from load_and_process_data, so it runs once per data version and is
+    cached with it: the charts can never disagree with the live numbers.
+    """
+    cube = data['cube']
+    # Every snapshot is kept; the chart resamples and downsamples per date range
+    trend = headcount_by_period(data['hc'], HEADCOUNT_GROUPS, freq=None)
+    total = trend[list(HEADCOUNT_GROUPS)].sum(axis=1)
+    rightsizing = None
+    if len(trend) > 1 and total.idxmax() < len(trend) - 1:
+        rightsizing = (trend['date'].iloc[total.idxmax()], trend['date'].iloc[-1])
+
+    summary = cube.department_summary()
+    names = summary['Dept_Unified'].astype(str)
+    risk = pd.DataFrame({
+        'name': names,
+        'investment': summary['Investment'].round().astype(int),
+        'voluntary': summary['Voluntary'].astype(int),
+        'dismissal': summary['Dismissal'].astype(int),
+        'totalExits': summary['Total_Exits'].astype(int),
+        'headcount': names.map(DEPARTMENT_HEADCOUNT).fillna(float(np.median(list(DEPARTMENT_HEADCOUNT.values())))),
+        'color': [DEPARTMENT_COLORS.get(n, PALETTE[i % len(PALETTE)]) for i, n in enumerate(names)],
+    })
+
+    exit_types = data['exit_types']
+    if not exit_types.empty:
+        kinds = classify_exit_types(exit_types['Label']).astype(str)
+        exit_type = [{"name": label, "value": int(count), "kind": kind,
+                      "color": EXIT_TYPE_COLORS.get(label, PALETTE[i % len(PALETTE)])}
+                     for i, (label, count, kind)
+                     in enumerate(zip(exit_types['Label'], exit_types['Count'], kinds))]
+    else:
+        # No exit-type summary in the sheet: fall back to the department tables
+        exit_type = [
+            {"name": "Voluntary", "value": int(summary['Voluntary'].sum()), "kind": "Voluntary", "color": PURPLE},
+            {"name": "Involuntary (Dismissal)", "value": int(summary['Dismissal'].sum()), "kind": "Dismissal",
+             "color": PINK},
+        ]
+    return {
+        'attrition_bands': simulate_bands(data['hc'], data['turnover'].set_index('Entity')['Annual_Turnover']),
+        'headcount_trend': trend,
+        'headcount_key': hashlib.sha256(pd.util.hash_pandas_object(trend, index=False).to_numpy().tobytes()).hexdigest()[:16],
+        'rightsizing': rightsizing,
+        'risk_matrix': risk.to_dict('records'),
+        'exit_type': exit_type,
+        'rolling': rolling_entity_metrics(data['hc_index'], HEADCOUNT_GROUPS, data['events']),
+        'rolling_departments': rolling_department_exits(data['events'], metric_months(data['hc_index'])),
+    }
+
+def turnover_vs_headcount(hc_index, events, start, end):
+    """Average headcount of each HEADCOUNT_GROUPS series over [start, end].
+
+    With event-level exits, adds the exits of the window and their rate vs
+    the average headcount. An event entity counts towards the group it names
+    or whose headcount columns include it.
+    """
+    avg = hc_index.average(start, end)
+    table = pd.DataFrame({
+        'Group': list(HEADCOUNT_GROUPS),
+        'Avg_Headcount': [avg.reindex(cols).fillna(0).sum() for cols in HEADCOUNT_GROUPS.values()],
+    })
+    if events is not None:
+        by_entity = pd.Series(events.count_matrix(start, end).sum(axis=(1, 2)), index=events.entities)
+        table['Exits'] = [by_entity[[e for e in by_entity.index if e == group or e in cols]].sum()
+                          for group, cols in HEADCOUNT_GROUPS.items()]
+        table['Rate'] = table['Exits'] / table['Avg_Headcount'].where(table['Avg_Headcount'] > 0)
+    return table
+
+
+# ============================================================
+# FIGURE BUILDERS
+# ============================================================
+# Pure functions of their inputs, memoized per input/filter tuple so reruns that
+# do not change a chart's inputs (tab switches, unrelated filters) reuse the cached
+# figure. max_entries bounds each cache (least recently used entries are evicted)
+# when many users share the app with different filters. The aggregate cube and
+# the exit event store are passed unhashed (_cube, _exits) and keyed by their
+# content fingerprint instead.
+
+FIGURE_CACHE_ENTRIES = 64
+WEBGL_POINT_THRESHOLD = 500  # scatter traces switch to Scattergl above this many points
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_area_figure(_trend, trend_key, start, end, rightsizing=None):
+    """Velocity chart for [start, end]: each period of the frequency picked from the
+    range keeps its end snapshot and extremes, then the series is downsampled to
+    at most about MAX_POINTS snapshots with peaks kept."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1)
+    window = _trend[(_trend['date'] >= start) & (_trend['date'] < end)]
+    groups = list(HEADCOUNT_GROUPS)
+    df_trend = downsample(resample_extremes(window, choose_frequency(start, end), groups), groups)
+    fig_area = go.Figure()
+    fig_area.add_trace(go.Scatter(
+        x=df_trend['date'], y=df_trend['Internal'],
+        name='FTEs (Internal)', mode='lines',
+        line=dict(color=BLUE, width=3),
+        fill='tozeroy', fillcolor='rgba(66,133,244,0.08)'
+    ))
+    fig_area.add_trace(go.Scatter(
+        x=df_trend['date'], y=df_trend['Agency'],
+        name='Contingent (Agency)', mode='lines',
+        line=dict(color=YELLOW, width=2), fill='none'
+    ))
+    fig_area.add_trace(go.Scatter(
+        x=df_trend['date'], y=df_trend['Deel'],
+        name='Deel (Remote FTE)', mode='lines',
+        line=dict(color=PURPLE, width=2, dash='dot'), fill='none'
+    ))
+    if rightsizing is not None and rightsizing[0] < end and rightsizing[1] >= start:
+        fig_area.add_vrect(
+            x0=max(rightsizing[0], start), x1=min(rightsizing[1], end),
+            fillcolor=PINK, opacity=0.07,
+            annotation_text="Rightsizing", annotation_position="top left",
+            annotation_font_color=PINK
+        )
+    years = f"{df_trend['date'].min():%Y}\u2013{df_trend['date'].max():%Y}" if len(df_trend) else ""
+    fig_area.update_layout(
+        title=dict(text=f"Workforce Velocity ({years})", font=dict(size=15, color=DARK)),
+        plot_bgcolor='white', paper_bgcolor='white',
+        xaxis=dict(showgrid=False, showline=False, tickfont=dict(color=MUTED)),
+        yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False, tickfont=dict(color=MUTED)),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0,
+                    font=dict(size=11, color=MUTED)),
+        hovermode='x unified',
+        margin=dict(l=0, r=0, t=50, b=0)
+    )
+    return fig_area
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_donut_figure(exit_type_records):
+    df_exit_pie = pd.DataFrame(exit_type_records)
+    total = df_exit_pie['value'].sum()
+    involuntary = df_exit_pie.loc[df_exit_pie['kind'] == 'Dismissal', 'value'].sum() / total if total else 0
+    fig_donut = go.Figure(go.Pie(
+        labels=df_exit_pie['name'],
+        values=df_exit_pie['value'],
+        hole=0.62,
+        marker=dict(colors=df_exit_pie['color'].tolist()),
+        textinfo='none',
+        hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Share: %{percent}<extra></extra>'
+    ))
+    fig_donut.update_layout(
+        title=dict(text="Exit Composition (2025)", font=dict(size=13, color=DARK)),
+        showlegend=True,
+        legend=dict(orientation='h', y=-0.1, font=dict(size=11, color=MUTED)),
+        margin=dict(l=0, r=0, t=50, b=30),
+        plot_bgcolor='white', paper_bgcolor='white',
+        annotations=[dict(
+            text=f"<b>{involuntary:.0%}</b><br>Involuntary", x=0.5, y=0.5,
+            font=dict(size=13, color=DARK), showarrow=False
+        )]
+    )
+    return fig_donut
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_churn_bar_figure(_exits, exits_key, selected_depts, date_range=None):
+    """Stacked exits per department from the cube, or from the event store for a date_range."""
+    if date_range is None:
+        df_exits_filtered = _exits.exits_by_type(list(selected_depts))
+    else:
+        df_exits_filtered = _exits.exits_by_type(list(selected_depts), *date_range)
+    fig_bar = px.bar(
+        df_exits_filtered,
+        x='Dept_Unified', y='Count', color='Type',
+        barmode='stack',
+        color_discrete_map={'Voluntary': PURPLE, 'Dismissal': PINK},
+        labels={'Dept_Unified': 'Department', 'Count': 'Exits'},
+    )
+    fig_bar.update_layout(
+        plot_bgcolor='white', paper_bgcolor='white',
+        xaxis=dict(showgrid=False, showline=False, tickfont=dict(color=MUTED)),
+        yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False, tickfont=dict(color=MUTED)),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0,
+                    title_text='', font=dict(size=11, color=MUTED)),
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return fig_bar
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_risk_scatter_figure(risk_records):
+    df_rm = pd.DataFrame(risk_records)
+    # One trace for all departments; WebGL once there are too many markers for SVG
+    scatter_cls = go.Scattergl if len(df_rm) > WEBGL_POINT_THRESHOLD else go.Scatter
+    fig_scatter = go.Figure(scatter_cls(
+        x=df_rm['investment'], y=df_rm['totalExits'],
+        mode='markers+text',
+        text=df_rm['name'],
+        textposition='top center',
+        marker=dict(
+            size=df_rm['headcount'] / 5,
+            color=df_rm['color'],
+            opacity=0.85,
+            line=dict(width=2, color='white')
+        ),
+        customdata=df_rm[['investment', 'totalExits', 'dismissal', 'voluntary']].to_numpy(),
+        hovertemplate=(
+            "<b>%{text}</b><br>"
+            "Training Spend: \u20ac%{customdata[0]:,}<br>"
+            "Total Exits: %{customdata[1]}<br>"
+            "Dismissals: %{customdata[2]}<br>"
+            "Voluntary: %{customdata[3]}<extra></extra>"
+        )
+    ))
+    mean_invest = df_rm['investment'].mean()
+    mean_exits  = df_rm['totalExits'].mean()
+    fig_scatter.add_vline(x=mean_invest, line_dash="dash", line_color="#94a3b8",
+                          annotation_text="Avg Spend", annotation_font_color=MUTED)
+    fig_scatter.add_hline(y=mean_exits, line_dash="dash", line_color="#94a3b8",
+                          annotation_text="Avg Churn", annotation_font_color=MUTED)
+    fig_scatter.update_layout(
+        title=dict(text="Efficiency Matrix: Training Investment vs. Total Exits",
+                   font=dict(size=15, color=DARK)),
+        xaxis=dict(title="Training Spend (\u20ac)", showgrid=True, gridcolor='#f1f5f9',
+                   showline=False, tickfont=dict(color=MUTED)),
+        yaxis=dict(title="Total Exits", showgrid=True, gridcolor='#f1f5f9',
+                   showline=False, tickfont=dict(color=MUTED)),
+        plot_bgcolor='white', paper_bgcolor='white',
+        showlegend=False,
+        margin=dict(l=0, r=0, t=50, b=0)
+    )
+    return fig_scatter
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_roi_figure(_cube, cube_key, selected_depts):
+    """ROI scatter for the selected departments, or None when none have both training and exits."""
+    df_roi = _cube.training_roi(list(selected_depts))
+    if df_roi.empty:
+        return None
+    fig_roi = px.scatter(
+        df_roi, x='Investment', y='Count',
+        size='Count', color='Dept_Unified', text='Dept_Unified',
+        labels={'Investment': 'Training Spend (\u20ac)', 'Count': 'Voluntary Exits',
+                'Dept_Unified': 'Department'},
+        size_max=60,
+        color_discrete_sequence=[PINK, PURPLE, BLUE, GREEN, YELLOW]
+    )
+    fig_roi.update_traces(textposition='top center')
+    if len(df_roi) > 1:
+        fig_roi.add_vline(x=df_roi['Investment'].mean(), line_dash="dash",
+                          line_color="#94a3b8", annotation_text="Avg Spend")
+        fig_roi.add_hline(y=df_roi['Count'].mean(), line_dash="dash",
+                          line_color="#94a3b8", annotation_text="Avg Churn")
+    fig_roi.update_layout(
+        plot_bgcolor='white', paper_bgcolor='white', showlegend=False,
+        xaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False,
+                   tickfont=dict(color=MUTED)),
+        yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False,
+                   tickfont=dict(color=MUTED)),
+        margin=dict(l=0, r=0, t=20, b=0)
+    )
+    return fig_roi
+
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_rolling_figure(rolling, window, metric, start, end):
+    """Trailing-window metric per headcount group for the months within [start, end]."""
+    df = rolling[(rolling['Window'] == window)
+                 & rolling['Month'].between(pd.Timestamp(start), pd.Timestamp(end))]
+    colors = dict(zip(HEADCOUNT_GROUPS, [BLUE, YELLOW, PURPLE]), Total=DARK)
+    fig_rolling = go.Figure()
+    for group, df_group in df.groupby('Group', sort=False):
+        fig_rolling.add_trace(go.Scatter(
+            x=df_group['Month'], y=df_group[metric], name=group, mode='lines',
+            line=dict(color=colors.get(group, MUTED), width=3 if group == 'Total' else 2,
+                      dash='dash' if group == 'Total' else 'solid'),
+            hovertemplate=f'%{{y:.1%}}<extra>{group}</extra>'
+        ))
+    fig_rolling.update_layout(
+        plot_bgcolor='white', paper_bgcolor='white',
+        xaxis=dict(showgrid=False, showline=False, tickfont=dict(color=MUTED)),
+        yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False, tickformat='.0%',
+                   tickfont=dict(color=MUTED)),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0,
+                    font=dict(size=11, color=MUTED)),
+        margin=dict(l=0, r=0, t=30, b=0), hovermode='x unified'
+    )
+    return fig_rolling
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_rolling_department_figure(rolling_departments, window, selected_depts, start, end):
+    """Trailing-window exits per selected department for the months within [start, end]."""
+    df = rolling_departments[(rolling_departments['Window'] == window)
+                             & rolling_departments['Department'].isin(selected_depts)
+                             & rolling_departments['Month'].between(pd.Timestamp(start), pd.Timestamp(end))]
+    fig_dept = px.line(
+        df, x='Month', y='Exits', color='Department',
+        color_discrete_map=DEPARTMENT_COLORS, color_discrete_sequence=PALETTE,
+        custom_data=['Share'],
+    )
+    fig_dept.update_traces(hovertemplate='%{y:.0f} exits (%{customdata[0]:.0%} of all)')
+    fig_dept.update_layout(
+        plot_bgcolor='white', paper_bgcolor='white',
+        xaxis=dict(showgrid=False, showline=False, title='', tickfont=dict(color=MUTED)),
+        yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False, title=f'Exits (trailing {window} months)',
+                   tickfont=dict(color=MUTED)),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0,
+                    title_text='', font=dict(size=11, color=MUTED)),
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return fig_dept
+
+
+SURVIVAL_CHART_MONTHS = 48  # tenure axis of the survival charts
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_survival_figures(_events, events_key, by, selected_depts):
+    """Kaplan-Meier curves per entity or department, the tenure-month hazard of all
+    selected leavers with the probation period shaded, and the probation-cliff table.
+
+    Returns None when no selected leaver has a tenure.
+    """
+    table = event_survival(_events, by, selected_depts)
+    if table.empty:
+        return None
+    table = table[table['Tenure_Month'] < SURVIVAL_CHART_MONTHS]
+    colors = {**DEPARTMENT_COLORS, 'All': DARK}
+    fig_km = go.Figure()
+    for i, (group, df_group) in enumerate(table.groupby('Group', sort=False)):
+        fig_km.add_trace(go.Scatter(
+            x=df_group['Tenure_Month'] + 1, y=df_group['Survival'], name=group, mode='lines',
+            line=dict(shape='hv', color=colors.get(group, PALETTE[i % len(PALETTE)]),
+                      width=3 if group == 'All' else 2, dash='dash' if group == 'All' else 'solid'),
+            hovertemplate=f'%{{y:.0%}} still employed after %{{x}} months<extra>{group}</extra>'
+        ))
+    fig_km.add_vrect(x0=0, x1=PROBATION_MONTHS, fillcolor=PINK, opacity=0.08, line_width=0,
+                     annotation_text="Probation", annotation_position="top left")
+
+    df_all = table[table['Group'] == 'All']
+    fig_hazard = go.Figure(go.Bar(
+        x=df_all['Tenure_Month'], y=df_all['Hazard'],
+        marker_color=np.where(df_all['Tenure_Month'] < PROBATION_MONTHS, PINK, PURPLE),
+        customdata=df_all[['At_Risk', 'Exits']],
+        hovertemplate='Month %{x}: %{y:.1%} of %{customdata[0]:.0f} still employed left<extra></extra>'
+    ))
+    for fig, y_title in ((fig_km, 'Share of leavers still employed'), (fig_hazard, 'Monthly exit hazard')):
+        fig.update_layout(
+            plot_bgcolor='white', paper_bgcolor='white',
+            xaxis=dict(showgrid=False, showline=False, title='Tenure (months)', tickfont=dict(color=MUTED)),
+            yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False, tickformat='.0%',
+                       title=y_title, tickfont=dict(color=MUTED)),
+            legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0,
+                        font=dict(size=11, color=MUTED)),
+            margin=dict(l=0, r=0, t=30, b=0)
+        )
+    return fig_km, fig_hazard, probation_cliff(table)
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_attrition_band_figure(bands):
+    """Cumulative recruitment need of the whole workforce: P10-P90 band around the median path."""
+    total = bands[bands['Entity'] == 'Total']
+    fig_band = go.Figure()
+    fig_band.add_trace(go.Scatter(
+        x=total['Month'], y=total['Cum_Recruitment_P90'],
+        name='P90', mode='lines', line=dict(width=0), showlegend=False
+    ))
+    fig_band.add_trace(go.Scatter(
+        x=total['Month'], y=total['Cum_Recruitment_P10'],
+        name='P10\u2013P90', mode='lines', line=dict(width=0),
+        fill='tonexty', fillcolor='rgba(163,125,255,0.2)'
+    ))
+    fig_band.add_trace(go.Scatter(
+        x=total['Month'], y=total['Cum_Recruitment_P50'],
+        name='Median', mode='lines', line=dict(color=PURPLE, width=3)
+    ))
+    fig_band.update_layout(
+        title=dict(text=f"Cumulative Recruitment Need \u2014 next {SIMULATION_MONTHS} months",
+                   font=dict(size=15, color=DARK)),
+        plot_bgcolor='white', paper_bgcolor='white',
+        xaxis=dict(showgrid=False, showline=False, tickfont=dict(color=MUTED)),
+        yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False, tickfont=dict(color=MUTED)),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0,
+                    font=dict(size=11, color=MUTED)),
+        hovermode='x unified',
+        margin=dict(l=0, r=0, t=50, b=0)
+    )
+    return fig_band
+
+
 # ============================================================
 # HEADER (always visible)
 # ============================================================
@@ -310,6 +691,10 @@ if data:
     df_hc       = data['hc']
     df_exits    = data['exits_dept']
     df_training = data['training']
+    cube        = data['cube']
+    events      = data['events']
+    hc_index    = data['hc_index']
+    views       = data['views']
 
     # --------------------------------------------------------
     # SIDEBAR
@@ -319,11 +704,13 @@ if data:
     min_date = df_hc['Fecha'].min().date()
     max_date = df_hc['Fecha'].max().date()
     start_date, end_date = st.sidebar.date_input("Select Range", [min_date, max_date])
-    mask = (df_hc['Fecha'].dt.date >= start_date) & (df_hc['Fecha'].dt.date <= end_date)
-    df_hc_filtered = df_hc.loc[mask]
+    df_hc_filtered = df_hc.iloc[cube.date_slice(start_date, end_date)]
 
-    all_depts = sorted(list(set(df_training['Dept_Unified'].unique()) | set(df_exits['Dept_Unified'].unique())))
+    all_depts = sorted(cube.observed_departments())
     selected_depts = st.sidebar.multiselect("Filter Departments", all_depts, default=all_depts)
+    unmapped = unmapped_labels(pd.concat([df_training['Department'], df_exits['Department']]))
+    if unmapped:
+        st.sidebar.caption(f"\u26a0\ufe0f Grouped as Other (not in department_taxonomy.csv): {', '.join(unmapped)}")
     st.sidebar.divider()
     st.sidebar.caption("\U0001f4cc Data sourced from 2025.xlsx & Headcount Evolution 2022-2026.xlsx")
 
@@ -383,16 +770,19 @@ if data:
     st.markdown("<br><hr>", unsafe_allow_html=True)
 
     # --------------------------------------------------------
-    # TABS
+    # VIEWS
     # --------------------------------------------------------
-    tab1, tab2, tab3 = st.tabs([
+    # st.tabs runs every tab body on each rerun; with a radio selector only the
+    # active view's data work and figures are executed.
+    VIEWS = [
         "\U0001f3af Executive Briefing",
         "\U0001f4c8 Growth & Velocity",
         "\u26a1 Efficiency & Risk"
-    ])
+    ]
+    view = st.radio("View", VIEWS, horizontal=True, label_visibility="collapsed", key="view")
 
     # --- TAB 1: EXECUTIVE BRIEFING ---
-    with tab1:
+    if view == VIEWS[0]:
         st.markdown("### Executive Briefing: The \"So What?\"")
         st.markdown(
             f"<div style='color:{MUTED}; margin-bottom:1.5rem; font-size:0.9rem;'>"
@@ -427,67 +817,16 @@ if data:
         """, unsafe_allow_html=True)
 
     # --- TAB 2: GROWTH & VELOCITY ---
-    with tab2:
+    elif view == VIEWS[1]:
         col_g1, col_g2 = st.columns([2, 1])
 
         with col_g1:
-            df_trend = pd.DataFrame(HEADCOUNT_TREND)
-            fig_area = go.Figure()
-            fig_area.add_trace(go.Scatter(
-                x=df_trend['date'], y=df_trend['Internal'],
-                name='FTEs (Internal)', mode='lines',
-                line=dict(color=BLUE, width=3),
-                fill='tozeroy', fillcolor='rgba(66,133,244,0.08)'
-            ))
-            fig_area.add_trace(go.Scatter(
-                x=df_trend['date'], y=df_trend['Agency'],
-                name='Contingent (Agency)', mode='lines',
-                line=dict(color=YELLOW, width=2), fill='none'
-            ))
-            fig_area.add_trace(go.Scatter(
-                x=df_trend['date'], y=df_trend['Deel'],
-                name='Deel (Remote FTE)', mode='lines',
-                line=dict(color=PURPLE, width=2, dash='dot'), fill='none'
-            ))
-            fig_area.add_vrect(
-                x0="Oct 25", x1="Jan 26",
-                fillcolor=PINK, opacity=0.07,
-                annotation_text="Rightsizing", annotation_position="top left",
-                annotation_font_color=PINK
-            )
-            fig_area.update_layout(
-                title=dict(text="Workforce Velocity (2022\u20132026)", font=dict(size=15, color=DARK)),
-                plot_bgcolor='white', paper_bgcolor='white',
-                xaxis=dict(showgrid=False, showline=False, tickfont=dict(color=MUTED)),
-                yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False, tickfont=dict(color=MUTED)),
-                legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0,
-                            font=dict(size=11, color=MUTED)),
-                hovermode='x unified',
-                margin=dict(l=0, r=0, t=50, b=0)
-            )
+            fig_area = build_area_figure(views['headcount_trend'], views['headcount_key'],
+                                         start_date, end_date, views['rightsizing'])
             st.plotly_chart(fig_area, use_container_width=True)
 
         with col_g2:
-            df_exit_pie = pd.DataFrame(EXIT_TYPE_DATA)
-            fig_donut = go.Figure(go.Pie(
-                labels=df_exit_pie['name'],
-                values=df_exit_pie['value'],
-                hole=0.62,
-                marker=dict(colors=[PURPLE, PINK]),
-                textinfo='none',
-                hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Share: %{percent}<extra></extra>'
-            ))
-            fig_donut.update_layout(
-                title=dict(text="Exit Composition (2025)", font=dict(size=13, color=DARK)),
-                showlegend=True,
-                legend=dict(orientation='h', y=-0.1, font=dict(size=11, color=MUTED)),
-                margin=dict(l=0, r=0, t=50, b=30),
-                plot_bgcolor='white', paper_bgcolor='white',
-                annotations=[dict(
-                    text="<b>65%</b><br>Involuntary", x=0.5, y=0.5,
-                    font=dict(size=13, color=DARK), showarrow=False
-                )]
-            )
+            fig_donut = build_donut_figure(views['exit_type'])
             st.plotly_chart(fig_donut, use_container_width=True)
 
             st.markdown(f"""
@@ -498,26 +837,54 @@ if data:
             </div>
             """, unsafe_allow_html=True)
 
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.subheader("Turnover vs Average Headcount")
+        turnover = turnover_vs_headcount(hc_index, events, start_date, end_date)
+        for col, row in zip(st.columns(len(turnover)), turnover.itertuples()):
+            with col:
+                if events is not None:
+                    st.metric(f"{row.Group} exit rate", f"{row.Rate:.1%}" if pd.notna(row.Rate) else "n/a",
+                              help=f"{row.Exits:,.0f} exits / {row.Avg_Headcount:,.1f} average headcount")
+                else:
+                    st.metric(f"{row.Group} avg headcount", f"{row.Avg_Headcount:,.1f}")
+        st.caption(f"Time-weighted average headcount between {start_date:%d %b %Y} and {end_date:%d %b %Y}"
+                   + ("." if events is not None else "; exit rates need the event-level exits sheet."))
+
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.subheader("Rolling Turnover & Retention")
+        rolling = views['rolling']
+        metrics = ['Turnover', 'Retention', 'Net_Change'] if 'Turnover' in rolling.columns else ['Net_Change']
+        col_w, col_m = st.columns(2)
+        with col_w:
+            window = st.radio("Trailing window (months)", WINDOWS, index=len(WINDOWS) - 1,
+                              horizontal=True, key="rolling_window")
+        with col_m:
+            metric = st.radio("Metric", metrics, horizontal=True, key="rolling_metric",
+                              format_func=lambda m: m.replace('_', ' '))
+        st.plotly_chart(build_rolling_figure(rolling, window, metric, start_date, end_date),
+                        use_container_width=True)
+        if events is not None:
+            st.plotly_chart(build_rolling_department_figure(views['rolling_departments'], window,
+                                                            tuple(selected_depts), start_date, end_date),
+                            use_container_width=True)
+            st.caption("Turnover = exits / average headcount of the window; retention = 1 - exits / "
+                       "opening headcount. Departments have no headcount series, so they show exit counts.")
+        else:
+            st.caption("Net headcount change only: turnover and retention need the event-level exits sheet.")
+
         st.markdown("<br>", unsafe_allow_html=True)
         st.subheader("Churn Hotspots by Department")
 
-        df_exits_filtered = df_exits[df_exits['Dept_Unified'].isin(selected_depts)]
-        fig_bar = px.bar(
-            df_exits_filtered,
-            x='Dept_Unified', y='Count', color='Type',
-            barmode='stack',
-            color_discrete_map={'Voluntary': PURPLE, 'Dismissal': PINK},
-            labels={'Dept_Unified': 'Department', 'Count': 'Exits'},
-        )
-        fig_bar.update_layout(
-            plot_bgcolor='white', paper_bgcolor='white',
-            xaxis=dict(showgrid=False, showline=False, tickfont=dict(color=MUTED)),
-            yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False, tickfont=dict(color=MUTED)),
-            legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='left', x=0,
-                        title_text='', font=dict(size=11, color=MUTED)),
-            margin=dict(l=0, r=0, t=30, b=0)
-        )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        if events is not None:
+            fig_bar = build_churn_bar_figure(events, events.key, tuple(selected_depts), (start_date, end_date))
+            st.plotly_chart(fig_bar, use_container_width=True)
+            st.caption(f"{events.count(start_date, end_date, selected_depts):,} exits between "
+                       f"{start_date:%d %b %Y} and {end_date:%d %b %Y} (event-level '{EVENT_SHEET}' sheet).")
+        else:
+            fig_bar = build_churn_bar_figure(cube, cube.key, tuple(selected_depts))
+            st.plotly_chart(fig_bar, use_container_width=True)
+            st.caption("2025 totals from the aggregated 'Internal exits' blocks; "
+                       "the timeframe filter applies once an event-level exits sheet is available.")
 
         st.markdown(f"""
         <div style="background:#fff1f4; border:1px solid #fecdd8; border-radius:10px;
@@ -527,51 +894,21 @@ if data:
         </div>
         """, unsafe_allow_html=True)
 
+        bands = views['attrition_bands']
+        if not bands.empty:
+            st.markdown("<br>", unsafe_allow_html=True)
+            st.subheader("Attrition Simulation")
+            st.plotly_chart(build_attrition_band_figure(bands), use_container_width=True)
+            st.caption(f"{SIMULATION_PATHS:,} simulated attrition paths per entity, with turnover rates "
+                       "from the TurnoverRetention sheet; leavers are backfilled and the plan grows at "
+                       "the trailing 12-month rate.")
+
     # --- TAB 3: EFFICIENCY & RISK ---
-    with tab3:
+    elif view == VIEWS[2]:
         col_r1, col_r2 = st.columns([2, 1])
 
         with col_r1:
-            df_rm = pd.DataFrame(RISK_MATRIX)
-            fig_scatter = go.Figure()
-            for _, row in df_rm.iterrows():
-                fig_scatter.add_trace(go.Scatter(
-                    x=[row['investment']], y=[row['totalExits']],
-                    mode='markers+text',
-                    name=row['name'],
-                    text=[row['name']],
-                    textposition='top center',
-                    marker=dict(
-                        size=row['headcount'] / 5,
-                        color=row['color'],
-                        opacity=0.85,
-                        line=dict(width=2, color='white')
-                    ),
-                    hovertemplate=(
-                        f"<b>{row['name']}</b><br>"
-                        f"Training Spend: \u20ac{row['investment']:,}<br>"
-                        f"Total Exits: {row['totalExits']}<br>"
-                        f"Dismissals: {row['dismissal']}<br>"
-                        f"Voluntary: {row['voluntary']}<extra></extra>"
-                    )
-                ))
-            mean_invest = df_rm['investment'].mean()
-            mean_exits  = df_rm['totalExits'].mean()
-            fig_scatter.add_vline(x=mean_invest, line_dash="dash", line_color="#94a3b8",
-                                  annotation_text="Avg Spend", annotation_font_color=MUTED)
-            fig_scatter.add_hline(y=mean_exits, line_dash="dash", line_color="#94a3b8",
-                                  annotation_text="Avg Churn", annotation_font_color=MUTED)
-            fig_scatter.update_layout(
-                title=dict(text="Efficiency Matrix: Training Investment vs. Total Exits",
-                           font=dict(size=15, color=DARK)),
-                xaxis=dict(title="Training Spend (\u20ac)", showgrid=True, gridcolor='#f1f5f9',
-                           showline=False, tickfont=dict(color=MUTED)),
-                yaxis=dict(title="Total Exits", showgrid=True, gridcolor='#f1f5f9',
-                           showline=False, tickfont=dict(color=MUTED)),
-                plot_bgcolor='white', paper_bgcolor='white',
-                showlegend=False,
-                margin=dict(l=0, r=0, t=50, b=0)
-            )
+            fig_scatter = build_risk_scatter_figure(views['risk_matrix'])
             st.plotly_chart(fig_scatter, use_container_width=True)
 
         with col_r2:
@@ -618,37 +955,35 @@ if data:
         # Live ROI from parsed Excel data
         st.markdown("<br>", unsafe_allow_html=True)
         st.subheader("Live Data: Training ROI by Department")
-        train_agg = df_training.groupby('Dept_Unified')['Investment'].sum().reset_index()
-        exit_agg  = df_exits[df_exits['Type'] == 'Voluntary'].groupby('Dept_Unified')['Count'].sum().reset_index()
-        df_roi    = pd.merge(train_agg, exit_agg, on='Dept_Unified', how='inner')
-        df_roi    = df_roi[df_roi['Dept_Unified'].isin(selected_depts)]
-
-        if not df_roi.empty:
-            fig_roi = px.scatter(
-                df_roi, x='Investment', y='Count',
-                size='Count', color='Dept_Unified', text='Dept_Unified',
-                labels={'Investment': 'Training Spend (\u20ac)', 'Count': 'Voluntary Exits',
-                        'Dept_Unified': 'Department'},
-                size_max=60,
-                color_discrete_sequence=[PINK, PURPLE, BLUE, GREEN, YELLOW]
-            )
-            fig_roi.update_traces(textposition='top center')
-            if len(df_roi) > 1:
-                fig_roi.add_vline(x=df_roi['Investment'].mean(), line_dash="dash",
-                                  line_color="#94a3b8", annotation_text="Avg Spend")
-                fig_roi.add_hline(y=df_roi['Count'].mean(), line_dash="dash",
-                                  line_color="#94a3b8", annotation_text="Avg Churn")
-            fig_roi.update_layout(
-                plot_bgcolor='white', paper_bgcolor='white', showlegend=False,
-                xaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False,
-                           tickfont=dict(color=MUTED)),
-                yaxis=dict(showgrid=True, gridcolor='#f1f5f9', showline=False,
-                           tickfont=dict(color=MUTED)),
-                margin=dict(l=0, r=0, t=20, b=0)
-            )
+        fig_roi = build_roi_figure(cube, cube.key, tuple(selected_depts))
+
+        if fig_roi is not None:
             st.plotly_chart(fig_roi, use_container_width=True)
         else:
             st.info("No ROI data available for selected departments.")
 
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.subheader("Tenure Survival & Probation Cliff")
+        if events is not None:
+            by = st.radio("Curves by", ["Entity", "Department"], horizontal=True, key="survival_by")
+            survival_figures = build_survival_figures(events, events.key, by, tuple(selected_depts))
+            if survival_figures is not None:
+                fig_km, fig_hazard, cliff = survival_figures
+                col_s1, col_s2 = st.columns(2)
+                with col_s1:
+                    st.plotly_chart(fig_km, use_container_width=True)
+                with col_s2:
+                    st.plotly_chart(fig_hazard, use_container_width=True)
+                overall = cliff.set_index('Group').loc['All']
+                ratio = (f"; the monthly exit hazard during probation is {overall['Cliff_Ratio']:.1f}x "
+                         "that of the following year" if pd.notna(overall['Cliff_Ratio']) else "")
+                st.caption(f"{overall['Probation_Exit_Share']:.0%} of the {overall['Leavers']:,.0f} selected "
+                           f"leavers left within the {PROBATION_MONTHS}-month probation{ratio}. Curves show "
+                           "tenure at exit: the exits sheet lists leavers only, so every record is an exit.")
+            else:
+                st.info("No tenure data for the selected departments.")
+        else:
+            st.info(f"Tenure survival needs the event-level '{EVENT_SHEET}' sheet (one row per leaver with tenure).")
+
 else:
     st.info("\u23f3 Awaiting data... Please ensure the Excel files are in the app directory.")
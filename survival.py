@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# --- TENURE SURVIVAL ---
+# Kaplan-Meier retention curves by tenure month. Every group (entity,
+# department, plus 'All') is estimated in the same pass: durations are binned
+# by (group, tenure month) with bincount, at-risk counts are reversed cumulative
+# sums along the month axis and survival is a cumulative product of (1 - hazard).
+
+# Probation length in months: the 'Exit timing' block has no probation exit
+# later than 2.5 months
+PROBATION_MONTHS = 3
+Z_95 = 1.96
+
+
+def kaplan_meier(durations, observed=None, groups=None, n_groups=None):
+    """Discrete monthly Kaplan-Meier estimate for every group at once.
+
+    durations are tenures in months; observed flags exits (1) vs censored
+    records such as active employees (0), all exits by default; groups are
+    integer codes (all 0 by default). Month t covers tenure [t, t + 1).
+    Returns a dict of (groups, months) arrays: 'at_risk', 'exits', 'hazard',
+    'survival' (share still employed after month t) and its Greenwood 'se'.
+    """
+    durations = np.asarray(durations, dtype=float)
+    observed = np.ones(len(durations)) if observed is None else np.asarray(observed, dtype=float)
+    groups = np.zeros(len(durations), dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+    valid = np.isfinite(durations) & (durations >= 0) & (groups >= 0)
+    months = np.floor(durations[valid]).astype(np.int64)
+    n_months = int(months.max()) + 1 if len(months) else 1
+    n_groups = int(n_groups if n_groups is not None else (groups[valid].max() + 1 if valid.any() else 1))
+
+    flat = groups[valid] * n_months + months
+    size = n_groups * n_months
+    total = np.bincount(flat, minlength=size).reshape(n_groups, n_months)
+    exits = np.bincount(flat, weights=observed[valid], minlength=size).reshape(n_groups, n_months)
+    at_risk = np.cumsum(total[:, ::-1], axis=1)[:, ::-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hazard = np.where(at_risk > 0, exits / at_risk, 0.0)
+        survival = np.cumprod(1 - hazard, axis=1)
+        greenwood = np.cumsum(np.where(at_risk > exits, exits / (at_risk * (at_risk - exits)), 0.0), axis=1)
+    return {'at_risk': at_risk, 'exits': exits, 'hazard': hazard,
+            'survival': survival, 'se': survival * np.sqrt(greenwood)}
+
+
+def survival_table(durations, groups, labels, observed=None, include_all=True):
+    """Long frame Group / Tenure_Month / At_Risk / Exits / Hazard / Survival (+ 95% band).
+
+    groups are codes into labels; with include_all an 'All' group over every
+    record is estimated in the same pass. Groups without records are dropped.
+    """
+    durations = np.asarray(durations, dtype=float)
+    groups = np.asarray(groups, dtype=np.int64)
+    labels = list(labels)
+    if include_all:
+        durations = np.concatenate([durations, durations])
+        groups = np.concatenate([groups, np.full(len(groups), len(labels))])
+        observed = None if observed is None else np.concatenate([observed, observed])
+        labels.append('All')
+    km = kaplan_meier(durations, observed, groups, n_groups=len(labels))
+    n_groups, n_months = km['survival'].shape
+    table = pd.DataFrame({
+        'Group': np.repeat(np.asarray(labels, dtype=object), n_months),
+        'Tenure_Month': np.tile(np.arange(n_months), n_groups),
+    })
+    for col, key in [('At_Risk', 'at_risk'), ('Exits', 'exits'), ('Hazard', 'hazard'), ('Survival', 'survival')]:
+        table[col] = km[key].ravel()
+    table['Survival_Low'] = np.clip(km['survival'] - Z_95 * km['se'], 0, 1).ravel()
+    table['Survival_High'] = np.clip(km['survival'] + Z_95 * km['se'], 0, 1).ravel()
+    present = np.repeat(km['at_risk'][:, 0] > 0, n_months)
+    return table[present].reset_index(drop=True)
+
+
+def event_survival(events, by='Entity', depts=None):
+    """survival_table over the tenures of an ExitEventStore, per entity or per department.
+
+    depts restricts the events to those departments (the 'All' group too).
+    """
+    keep = np.isfinite(events.tenure)
+    if depts is not None:
+        keep &= np.isin(events.dept_codes, events.departments.get_indexer(list(depts)))
+    if by == 'Entity':
+        codes, labels = events.entity_codes, events.entities
+    else:
+        codes, labels = events.dept_codes, events.departments
+    return survival_table(events.tenure[keep], codes[keep], labels)
+
+
+def probation_cliff(table, probation_months=PROBATION_MONTHS, after_months=12):
+    """Per group: leavers, share exiting during probation, and the hazard jump at its end.
+
+    Cliff_Ratio is the mean monthly hazard during probation over the mean
+    monthly hazard in the after_months that follow it.
+    """
+    month = table['Tenure_Month'].to_numpy()
+    in_probation = month < probation_months
+    after = (month >= probation_months) & (month < probation_months + after_months)
+    # months past a group's longest tenure have nobody at risk, not zero hazard
+    hazard = np.where(table['At_Risk'].to_numpy() > 0, table['Hazard'].to_numpy(), np.nan)
+    frame = pd.DataFrame({
+        'Group': table['Group'],
+        'first': month == 0,
+        'last_probation': month == probation_months - 1,
+        'h_probation': np.where(in_probation, hazard, np.nan),
+        'h_after': np.where(after, hazard, np.nan),
+    })
+    grouped = frame.groupby('Group', sort=False)
+    survival_end = table['Survival'].where(frame['last_probation']).groupby(frame['Group'], sort=False).max()
+    leavers = table['At_Risk'].where(frame['first']).groupby(frame['Group'], sort=False).max()
+    cliff = pd.DataFrame({
+        'Leavers': leavers,
+        # no tenure reaches the end of probation: every leaver left during it
+        'Probation_Exit_Share': 1 - survival_end.fillna(0),
+        'Hazard_Probation': grouped['h_probation'].mean(),
+        'Hazard_After': grouped['h_after'].mean(),
+    })
+    cliff['Cliff_Ratio'] = cliff['Hazard_Probation'] / cliff['Hazard_After'].where(cliff['Hazard_After'] > 0)
+    return cliff.rename_axis('Group').reset_index()
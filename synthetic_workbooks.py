@@ -0,0 +1,324 @@
+import os
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from department_taxonomy import TAXONOMY_FILE
+from exit_events import EVENT_SHEET
+from split_excel import load_manifest, output_path_for, save_manifest
+
+# --- SYNTHETIC WORKBOOKS ---
+# Seeded stand-ins for '2025.xlsx' and 'Headcount Evolution 2022-2026.xlsx'
+# with the same messy layout: title rows, headers offset from the title,
+# blank separators, 'Total' rows, side-by-side blocks and Spanish/English
+# labels. Sizes scale with rows / departments / years / sheets, so parsing
+# and generation can be load-tested offline without employee data. The split
+# CSVs are named like split_excel's output, so the Excel Generator reads them.
+# Point the apps at the output with PEOPLEMETRICS_DATA_DIR; existing files are
+# never overwritten without force, so the real exports cannot be clobbered.
+
+HC_WORKBOOK = 'Headcount Evolution 2022-2026.xlsx'
+HC_SHEET = 'Hoja 1'
+EXITS_WORKBOOK = '2025.xlsx'
+OUTPUT_FORMATS = ('xlsx', 'csv')
+
+# Headcount entity columns with (opening size, first year offset); later entities start empty
+HC_ENTITIES = {
+    'Leadtech': (420, 0), 'Randstad': (18, 0), 'Deel': (4, 0), 'Zemsania': (6, 2),
+    'Outvise&Capitole&Izertis&Ox': (1, 3), 'Freelance': (1, 0), 'B2B': (3, 3), 'China': (4, 3),
+}
+HC_START = '2022-03-28'
+
+# Entities of the per-leaver sheet, drawn in proportion to their opening headcount
+EVENT_ENTITIES = ['Leadtech', 'Deel', 'Randstad', 'Freelance', 'Zemsania', 'B2B', 'China']
+# Raw exit-type labels (both languages) and their share of exits
+EVENT_TYPES = {'Voluntary exit': 0.25, 'Baja voluntaria': 0.07, 'Disciplinary dismissal': 0.30,
+               'Despido disciplinario': 0.08, 'Objective dismissal': 0.22, 'Despido objetivo': 0.08}
+PROBATION_SHARE = 0.12  # exits that happen during the probation months
+PROBATION_MONTHS = 3
+# The aggregated sheets summarize one year, like the real 2025 export
+REPORT_YEAR = 2025
+# Headcount is scaled up with the number of events so annual turnover stays plausible
+ANNUAL_TURNOVER = 0.25
+
+
+def department_labels(n, rng):
+    """n raw department labels taken from the taxonomy, with the casing/spacing noise of the exports.
+
+    Beyond the taxonomy's labels, 'DEPT nnn' labels are added (they map to Other).
+    """
+    labels = list(pd.read_csv(TAXONOMY_FILE, comment='#', dtype=str)['label'])
+    labels += [f'DEPT {i:03d}' for i in range(max(n - len(labels), 0))]
+    labels = labels[:n]
+    noise = rng.integers(0, 4, len(labels))
+    return [[label, label.title(), label + ' ', label.replace('/', '/ ').replace(' - ', '-')][k]
+            for label, k in zip(labels, noise)]
+
+
+def headcount_table(years, rng, scale=1.0):
+    """Weekly headcount snapshots over the given years, one random walk per entity plus TOTAL."""
+    dates = pd.date_range(HC_START, periods=int(years * 52) + 1, freq='7D')
+    steps = rng.normal(0.002, 0.02, (len(dates), len(HC_ENTITIES)))
+    opening = scale * np.array([size for size, _ in HC_ENTITIES.values()], dtype=float)
+    values = np.rint(opening * np.exp(np.cumsum(steps, axis=0)))
+    table = pd.DataFrame(values, columns=list(HC_ENTITIES))
+    first_year = np.array([offset for _, offset in HC_ENTITIES.values()])
+    started = (dates.year - dates.year[0]).to_numpy()[:, None] >= first_year
+    table = table.where(started)
+    table.insert(0, 'Fecha', dates)
+    table['TOTAL'] = table[list(HC_ENTITIES)].sum(axis=1)
+    return table
+
+
+def exit_events_table(rows, labels, dates, rng):
+    """One row per leaver with Spanish headers, dated within the headcount range."""
+    span_days = max((dates[-1] - dates[0]).days, 1)
+    in_probation = rng.random(rows) < PROBATION_SHARE
+    tenure = np.where(in_probation, rng.uniform(0, PROBATION_MONTHS, rows), rng.gamma(1.6, 14, rows))
+    types = list(EVENT_TYPES)
+    weights = np.array([HC_ENTITIES[e][0] for e in EVENT_ENTITIES], dtype=float)
+    return pd.DataFrame({
+        'Fecha de baja': dates[0] + pd.to_timedelta(rng.integers(0, span_days + 1, rows), unit='D'),
+        'Entidad': rng.choice(EVENT_ENTITIES, rows, p=weights / weights.sum()),
+        'Departamento': rng.choice(np.asarray(labels, dtype=object), rows),
+        'Tipo de baja': rng.choice(types, rows, p=list(EVENT_TYPES.values())),
+        'Antigüedad (meses)': np.round(tenure, 1),
+    })
+
+
+def _grid(blocks, width):
+    """Stacks blocks (lists of rows) into one object frame, padding every row to width."""
+    rows = [list(row) + [None] * (width - len(row)) for block in blocks for row in block]
+    return pd.DataFrame(rows, dtype=object)
+
+
+def _side_by_side(left, right, gap=3):
+    """Places block right next to block left, gap empty columns apart."""
+    width = max(len(r) for r in left)
+    height = max(len(left), len(right))
+    left = left + [[]] * (height - len(left))
+    right = right + [[]] * (height - len(right))
+    return [list(l) + [None] * (width - len(l) + gap) + list(r) for l, r in zip(left, right)]
+
+
+def _dept_block(title, counts, total_label='Total'):
+    total = int(counts.sum())
+    body = [[dept, int(n), n / total if total else 0] for dept, n in counts.items() if n > 0]
+    return [[title], ['Departamento', 'Nº bajas voluntarias', 'Distribution'], *body, [total_label, total]]
+
+
+def internal_exits_sheet(events, avg_headcount):
+    """The 'Internal exits' layout: summary blocks, tenure buckets and the per-department tables."""
+    voluntary = events['Tipo de baja'].isin(['Voluntary exit', 'Baja voluntaria'])
+    disciplinary = events['Tipo de baja'].isin(['Disciplinary dismissal', 'Despido disciplinario'])
+    in_probation = events['Antigüedad (meses)'] < PROBATION_MONTHS
+    n_total, n_vol, n_dis = len(events), int(voluntary.sum()), int(disciplinary.sum())
+    n_obj = n_total - n_vol - n_dis
+    rate = lambda n: n / avg_headcount if avg_headcount else 0
+    tenure_vol = events.loc[voluntary, 'Antigüedad (meses)']
+
+    def tenure_row(label, values):
+        return [label, len(values), round(values.mean(), 1) if len(values) else 0,
+                values.min() if len(values) else 0, values.max() if len(values) else 0]
+
+    by_dept = lambda mask: events.loc[mask, 'Departamento'].value_counts()
+    blocks = [
+        [['Leadtech + Beijing Ypuzhuhui'], []],
+        [['Exit type', 'Number of exits', 'Rate vs avg HC', 'Total empleados', round(avg_headcount, 2)],
+         ['Voluntary exit', n_vol, rate(n_vol)], ['Dismissal', n_dis + n_obj, rate(n_dis + n_obj)],
+         ['TOTAL', n_total, rate(n_total)], [], []],
+        [['Exit type', 'Number of exits', 'Rate vs avg HC'],
+         ['Voluntary exit', n_vol, rate(n_vol)], ['Disciplinary dismissal', n_dis, rate(n_dis)],
+         ['Objective dismissal', n_obj, rate(n_obj)], ['TOTAL', n_total, rate(n_total)], []],
+        [['Tenure at exit (months)'], ['Exit timing', 'Voluntary exits', 'Avg tenure (months)', 'Min', 'Max'],
+         tenure_row('During probation period', tenure_vol[tenure_vol < PROBATION_MONTHS]),
+         tenure_row('After probation period', tenure_vol[tenure_vol >= PROBATION_MONTHS]), [], []],
+        _side_by_side(_dept_block('Voluntary exit per Department (After Probation)', by_dept(voluntary & ~in_probation)),
+                      _dept_block('Voluntary exit per Department (Before Probation)', by_dept(voluntary & in_probation))),
+        [[], []],
+        _side_by_side(_dept_block('Disciplinary dismissal', by_dept(disciplinary & ~in_probation)),
+                      _dept_block('Dismissal during per Department (Before Probation)', by_dept(disciplinary & in_probation))),
+    ]
+    return _grid(blocks, width=9)
+
+
+def training_sheet(labels, rng):
+    """The 'Training investment' layout: indicator block, hours buckets and the per-department table."""
+    investment = np.round(rng.gamma(1.2, 3000, len(labels)) + 400, 2)
+    hours = rng.integers(1, 1800, len(labels))
+    order = np.argsort(-hours)
+    buckets = ['≤8h', '≤16h', '≤24h', '≤50h', '>50h']
+    bucket_hours = rng.multinomial(int(hours.sum()), [0.04, 0.06, 0.02, 0.08, 0.80])
+    blocks = [
+        [['Indicador', 'Value'], ['Inversión total 2025 (€)', round(float(investment.sum()), 2)],
+         ['Horas totales de formación 2025', int(hours.sum())],
+         ['Número total de formaciones 2025', int(len(labels) * 12)], []],
+        [['Training investment by hours'], ['Type', 'Total hours'],
+         *[[b, int(h)] for b, h in zip(buckets, bucket_hours)], ['Total:', int(hours.sum())], [], []],
+        [['Training investment by department'], ['Department', 'Total invesment (€)', 'Total hours'],
+         *[[labels[i].upper().strip(), investment[i], int(hours[i])] for i in order]],
+    ]
+    return _grid(blocks, width=3)
+
+
+def turnover_sheet(events, hc):
+    """The 'TurnoverRetention' layout: entity header row, averages, exits and turnover/retention rates."""
+    groups = {'Internal + YouzhuHUI': ['Leadtech', 'China'], 'Deel': ['Deel'], 'Freelance/B2B': ['Freelance', 'B2B'],
+              'Randstad': ['Randstad'], 'Other consultancy': ['Zemsania', 'Outvise&Capitole&Izertis&Ox']}
+    average = [hc[cols].fillna(0).sum(axis=1).mean() for cols in groups.values()]
+    exits = [int(events['Entidad'].isin(cols).sum()) for cols in groups.values()]
+    average.append(sum(average))
+    exits.append(sum(exits))
+    rates = [e / a if a else 0 for e, a in zip(exits, average)]
+    blocks = [
+        [[], [None, *groups, 'Total'],
+         ['Averange employees/collaborators', *np.round(average, 2)],
+         ['Annual employee/collaboratiors exits', *exits],
+         ['Total turnover rate', *rates],
+         ['Retention rate', *[1 - r for r in rates]], []],
+    ]
+    return _grid(blocks, width=11)
+
+
+def nps_sheet(rng):
+    """The 'NPS' layout: category counts, the score and a free-text interpretation."""
+    counts = rng.multinomial(int(rng.integers(15, 400)), [0.35, 0.41, 0.24])
+    shares = counts / counts.sum()
+    blocks = [
+        [['NPS = % Promoters - % Detractors'], [], []],
+        [['Category', 'Nb', '%'], *[[c, int(n), s] for c, n, s in zip(['Promoters ', 'Passives ', 'Detractors '],
+                                                                     counts, shares)],
+         ['Total', int(counts.sum()), 1], []],
+        [['2025 NPS SCORE', round(100 * (shares[0] - shares[2]), 2)], [], []],
+        [['Score interpretation'], ['Synthetic data for load testing; not a real survey.']],
+    ]
+    return _grid(blocks, width=6)
+
+
+def filler_sheet(labels, n_rows, rng):
+    """A 'Consultancy'-style sheet of stacked title/header/body/Total blocks, about n_rows rows long."""
+    blocks, n = [], 0
+    while n < n_rows:
+        counts = pd.Series(rng.integers(0, 30, len(labels)), index=labels)
+        blocks.append(_dept_block(f'Collaboration ending per Department (Batch {len(blocks) + 1})', counts) + [[], []])
+        n += len(blocks[-1])
+    return _grid(blocks, width=3)
+
+
+def _csv_frame(df, header):
+    """The frame split_excel would export: the sheet's first row becomes the column labels."""
+    if header:
+        return df
+    first = df.iloc[0] if len(df) else pd.Series(dtype=object)
+    columns = [f'Unnamed: {i}' if pd.isna(v) else v for i, v in enumerate(first)]
+    body = df.iloc[1:].copy()
+    body.columns = columns
+    return body
+
+
+def output_paths(out_dir, workbook, sheets, formats):
+    """Every file write_workbook would write for workbook."""
+    path = os.path.join(out_dir, workbook)
+    paths = [path] if 'xlsx' in formats else []
+    if 'csv' in formats:
+        paths += [output_path_for(out_dir, path, sheet_name, 'csv') for sheet_name in sheets]
+    return paths
+
+
+def write_workbook(out_dir, workbook, sheets, formats):
+    """Writes {sheet: (frame, has_header)} as an .xlsx and/or split CSVs; returns seconds per format."""
+    path = os.path.join(out_dir, workbook)
+    timings = {}
+    if 'xlsx' in formats:
+        start = time.perf_counter()
+        with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+            for sheet_name, (df, header) in sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name, index=False, header=header)
+        timings['xlsx'] = time.perf_counter() - start
+    if 'csv' in formats:
+        start = time.perf_counter()
+        for sheet_name, (df, header) in sheets.items():
+            _csv_frame(df, header).to_csv(output_path_for(out_dir, path, sheet_name, 'csv'), index=False)
+        timings['csv'] = time.perf_counter() - start
+    return timings
+
+
+def generate_workbooks(out_dir, rows=10_000, departments=20, years=4, sheets=6, seed=2025,
+                       formats=OUTPUT_FORMATS, force=False):
+    """Writes a synthetic headcount workbook and exits workbook into out_dir.
+
+    rows is the number of per-leaver exit events; departments the number of
+    raw department labels; years the span of weekly headcount snapshots
+    (starting 2022-03-28, scaled with rows for about 25% annual turnover);
+    sheets the number of sheets in the exits workbook (the five the loaders
+    read, plus filler sheets of about rows / 10 rows each). The same seed
+    always produces the same files. Raises FileExistsError before writing
+    anything if an output already exists, unless force=True.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    labels = department_labels(departments, rng)
+    opening = sum(size for size, _ in HC_ENTITIES.values())
+    hc = headcount_table(years, rng, scale=max(rows / max(years, 1) / (ANNUAL_TURNOVER * opening), 1.0))
+    events = exit_events_table(rows, labels, pd.DatetimeIndex(hc['Fecha']), rng)
+
+    # aggregated sheets cover REPORT_YEAR, or the last year with snapshots when it is out of range
+    years_covered = hc['Fecha'].dt.year
+    year = REPORT_YEAR if (years_covered == REPORT_YEAR).any() else int(years_covered.max())
+    hc_year = hc[years_covered == year]
+    events_year = events[events['Fecha de baja'].dt.year == year]
+    internal = events_year[events_year['Entidad'].isin(['Leadtech', 'China'])]
+    avg_internal = float(hc_year[['Leadtech', 'China']].fillna(0).sum(axis=1).mean())
+
+    exits_sheets = {
+        'Internal exits': (internal_exits_sheet(internal, avg_internal), False),
+        'TurnoverRetention': (turnover_sheet(events_year, hc_year), False),
+        'NPS': (nps_sheet(rng), False),
+        'Training investment': (training_sheet(labels, rng), False),
+        EVENT_SHEET: (events, True),
+    }
+    for i in range(max(sheets - len(exits_sheets), 0)):
+        exits_sheets[f'Consultancy {i + 1}'] = (filler_sheet(labels, max(rows // 10, 20), rng), False)
+
+    workbooks = ((HC_WORKBOOK, {HC_SHEET: (hc, True)}), (EXITS_WORKBOOK, exits_sheets))
+    existing = [p for workbook, workbook_sheets in workbooks
+                for p in output_paths(out_dir, workbook, workbook_sheets, formats) if os.path.exists(p)]
+    if existing and not force:
+        raise FileExistsError(f"{len(existing)} output files already exist in {out_dir} "
+                              f"(e.g. {os.path.basename(existing[0])}); use force=True / --force to overwrite")
+
+    print(f"Writing synthetic workbooks to {out_dir} (seed {seed})...")
+    summary = {}
+    for workbook, workbook_sheets in workbooks:
+        timings = write_workbook(out_dir, workbook, workbook_sheets, formats)
+        n_rows = sum(len(df) for df, _ in workbook_sheets.values())
+        summary[workbook] = {'sheets': len(workbook_sheets), 'rows': n_rows, **timings}
+        print(f"  {workbook:<40} {len(workbook_sheets):>3} sheets {n_rows:>9} rows  "
+              + '  '.join(f"{fmt} {seconds:.2f}s" for fmt, seconds in timings.items()))
+
+    # Outputs split_excel recorded for these workbooks no longer match them
+    manifest = load_manifest(out_dir)
+    if any(manifest['workbooks'].pop(workbook, None) for workbook, _ in workbooks):
+        save_manifest(out_dir, manifest)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write seeded synthetic HR workbooks with the real messy layout.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--rows', type=int, default=10_000, help="Per-leaver exit events (default: 10000)")
+    parser.add_argument('--departments', type=int, default=20, help="Raw department labels (default: 20)")
+    parser.add_argument('--years', type=float, default=4, help="Years of weekly headcount snapshots (default: 4)")
+    parser.add_argument('--sheets', type=int, default=6, help="Sheets in the exits workbook (default: 6)")
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--format', dest='formats', nargs='+', choices=OUTPUT_FORMATS, default=list(OUTPUT_FORMATS),
+                        help="Output formats (default: xlsx csv)")
+    parser.add_argument('--force', action='store_true', help="Overwrite existing workbooks and CSVs in out_dir")
+    args = parser.parse_args()
+    try:
+        generate_workbooks(args.out_dir, args.rows, args.departments, args.years, args.sheets, args.seed,
+                           tuple(args.formats), args.force)
+    except FileExistsError as e:
+        parser.exit(1, f"{e}\n")
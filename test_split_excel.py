@@ -0,0 +1,50 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from split_excel import fresh_output, output_path_for, process_excel_files
+
+
+def _write_workbook(path, counts):
+    df = pd.DataFrame({
+        'Fecha': [datetime(2025, 1, 31), datetime(2025, 2, 28), datetime(2025, 3, 31)],
+        'Department': ['Product', 'Tech & IT', 'Marketing'],
+        'Count': counts,
+    })
+    df.to_excel(path, sheet_name='Exits', index=False)
+
+
+def _read(path):
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_feather(path)
+
+
+def test_columnar_outputs_keep_types(tmp_path):
+    workbook = str(tmp_path / '2025.xlsx')
+    _write_workbook(workbook, [1, 2, 3])
+    process_excel_files(str(tmp_path), formats=('csv', 'parquet', 'feather'))
+
+    for fmt in ('parquet', 'feather'):
+        df = _read(output_path_for(str(tmp_path), workbook, 'Exits', fmt))
+        assert pd.api.types.is_datetime64_any_dtype(df['Fecha'])
+        assert pd.api.types.is_integer_dtype(df['Count'])
+        assert df['Count'].tolist() == [1, 2, 3]
+
+
+def test_stale_format_is_rewritten(tmp_path):
+    target_dir = str(tmp_path)
+    workbook = str(tmp_path / '2025.xlsx')
+    parquet_path = output_path_for(target_dir, workbook, 'Exits', 'parquet')
+    _write_workbook(workbook, [1, 2, 3])
+    process_excel_files(target_dir, formats=('csv', 'parquet'))
+
+    _write_workbook(workbook, [10, 20, 30])
+    process_excel_files(target_dir, formats=('csv',))
+    # the old Parquet file is still on disk, but readers are sent to the fresh CSV
+    assert fresh_output(target_dir, workbook, 'Exits') == output_path_for(target_dir, workbook, 'Exits', 'csv')
+
+    summary = process_excel_files(target_dir, formats=('parquet',))
+    assert not summary[workbook]['skipped']
+    assert fresh_output(target_dir, workbook, 'Exits') == parquet_path
+    assert pd.read_parquet(parquet_path)['Count'].tolist() == [10, 20, 30]
+    assert os.path.exists(output_path_for(target_dir, workbook, 'Exits', 'csv'))
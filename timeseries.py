@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# --- RESAMPLING & DOWNSAMPLING ---
+# Headcount exports are irregular snapshot series (weekly in places, monthly in
+# others). Charts get a frequency picked from the visible date range, keep each
+# period's end snapshot and its extremes, and are then downsampled to at most
+# max_points rows, so the browser payload stays bounded no matter how many
+# snapshots the workbooks hold.
+
+MAX_POINTS = 300
+
+# Candidate output frequencies, finest first, with their approximate length in days
+FREQUENCIES = [('W', 7), ('M', 30.44), ('Q', 91.31)]
+
+
+def choose_frequency(start, end, max_points=MAX_POINTS):
+    """Finest of week / month / quarter giving at most max_points periods over [start, end]."""
+    span_days = max((pd.Timestamp(end) - pd.Timestamp(start)).days, 1)
+    for freq, days in FREQUENCIES:
+        if span_days / days <= max_points:
+            return freq
+    return FREQUENCIES[-1][0]
+
+
+def resample_last(df, freq, date_col='date'):
+    """Last row of each period (headcount is a stock, so the period-end snapshot is kept).
+
+    The date column keeps the snapshot's own date rather than the period label.
+    """
+    if df.empty:
+        return df
+    df = df.sort_values(date_col)
+    return df.groupby(df[date_col].dt.to_period(freq)).tail(1).reset_index(drop=True)
+
+
+def resample_extremes(df, freq, y_cols, date_col='date'):
+    """Rows of each period holding the lowest and highest total of y_cols, plus its last row.
+
+    Headcount is a stock, so the period-end snapshot is kept; the period's
+    minimum and maximum of the summed total are kept too, so a peak inside a
+    period is still there for the downsampler. Rows keep their own snapshot
+    dates rather than the period label.
+    """
+    if df.empty:
+        return df
+    df = df.sort_values(date_col).reset_index(drop=True)
+    period = df[date_col].dt.to_period(freq)
+    total = df[list(y_cols)].sum(axis=1)
+    by_period = total.groupby(period)
+    kept = np.concatenate([by_period.idxmin().to_numpy(), by_period.idxmax().to_numpy(),
+                           df.groupby(period).tail(1).index.to_numpy()])
+    return df.iloc[np.unique(kept)].reset_index(drop=True)
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the shape of (x, y).
+
+    The first and last points are always kept; each bucket in between keeps the
+    point forming the largest triangle with the previously kept point and the
+    mean of the next bucket.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nxt_lo, nxt_hi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        avg_x, avg_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        kept[b + 1] = prev
+    return kept
+
+
+def minmax_indices(y, n_out):
+    """Indices of the minimum and maximum of each of n_out // 2 equal buckets (plus both ends)."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    n_buckets = (n_out - 2) // 2
+    bounds = np.linspace(0, n, n_buckets + 1).astype(int)
+    starts = bounds[:-1]
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    bucket = np.repeat(np.arange(n_buckets), np.diff(bounds))
+    first_min = np.flatnonzero(y == mins[bucket])
+    first_max = np.flatnonzero(y == maxs[bucket])
+    # keep one index per bucket for each extreme
+    _, min_pick = np.unique(bucket[first_min], return_index=True)
+    _, max_pick = np.unique(bucket[first_max], return_index=True)
+    return np.unique(np.concatenate([[0, n - 1], first_min[min_pick], first_max[max_pick]]))
+
+
+def downsample(df, y_cols, max_points=MAX_POINTS, method='lttb', date_col='date'):
+    """At most about max_points rows of df, shaped on the sum of y_cols.
+
+    The rows holding the minimum and maximum of the total and of each column
+    are always kept, so peaks survive downsampling.
+    """
+    if len(df) <= max_points:
+        return df
+    total = df[list(y_cols)].sum(axis=1).to_numpy(dtype=float)
+    if method == 'minmax':
+        kept = minmax_indices(total, max_points)
+    else:
+        x = df[date_col].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        kept = lttb_indices(x, total, max_points)
+    extremes = [df[c].to_numpy(dtype=float) for c in y_cols]
+    extremes = [int(np.nanargmax(v)) for v in extremes] + [int(np.nanargmin(v)) for v in extremes]
+    extremes += [int(np.nanargmax(total)), int(np.nanargmin(total))]
+    return df.iloc[np.unique(np.concatenate([kept, extremes]))].reset_index(drop=True)
@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from messy_tables import SheetIndex, stream_messy_tables
+
+# --- WORKBOOK READER ---
+# Every XLSX is a zip archive; pd.read_excel(path, sheet_name=...) re-opens and
+# re-parses it on each call. WorkbookReader keeps one pd.ExcelFile per workbook
+# and serves all sheet reads from that handle, so reading N sheets costs one
+# open instead of N.
+#
+# Workbooks larger than stream_threshold_bytes are never materialised as a whole
+# sheet: rows are streamed by openpyxl in read-only mode, which parses the sheet
+# XML lazily, straight into the block locator. (calamine loads a whole sheet
+# before iterating it, so it would not bound memory here.)
+
+STREAM_THRESHOLD_BYTES = 50 * 1024 * 1024
+
+
+def _convert_cell(value):
+    if value is None or value == '':
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class WorkbookReader:
+    """Opens each workbook once and serves every sheet read from that handle.
+
+    Handles are re-opened only if the file changes on disk. Use as a context
+    manager (or call close()) to release the underlying files.
+    """
+
+    def __init__(self, stream_threshold_bytes=STREAM_THRESHOLD_BYTES):
+        self.stream_threshold_bytes = stream_threshold_bytes
+        self._handles = {}
+        self._stream_books = {}
+
+    def open(self, path):
+        """Returns the shared pd.ExcelFile for path."""
+        key = os.path.abspath(path)
+        mtime = os.stat(key).st_mtime_ns
+        cached = self._handles.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()
+        xls = pd.ExcelFile(key)
+        self._handles[key] = (mtime, xls)
+        return xls
+
+    def sheet_names(self, path):
+        return self.open(path).sheet_names
+
+    def read(self, path, sheet_name, **read_kwargs):
+        """Reads one sheet through the shared handle."""
+        return self.open(path).parse(sheet_name=sheet_name, **read_kwargs)
+
+    def read_many(self, path, sheet_names=None, **read_kwargs):
+        """Reads several sheets (all of them if sheet_names is None) as {name: DataFrame}."""
+        xls = self.open(path)
+        if sheet_names is None:
+            sheet_names = xls.sheet_names
+        return xls.parse(sheet_name=list(sheet_names), **read_kwargs)
+
+    def should_stream(self, path):
+        return self.stream_threshold_bytes is not None and os.path.getsize(path) > self.stream_threshold_bytes
+
+    def iter_rows(self, path, sheet_name):
+        """Yields the sheet's rows as lists of cell values, without loading the sheet.
+
+        Cells are converted like pd.read_excel does: empty -> NaN, integral
+        floats -> int. Trailing empty cells of a row may be omitted.
+        """
+        key = os.path.abspath(path)
+        if key not in self._stream_books:
+            self._stream_books[key] = load_workbook(key, read_only=True, data_only=True)
+        for row in self._stream_books[key][sheet_name].iter_rows(values_only=True):
+            yield [_convert_cell(v) for v in row]
+
+    def read_table(self, path, sheet_name):
+        """Reads a plain table (header in the first row); streamed for large workbooks."""
+        if not self.should_stream(path):
+            return self.read(path, sheet_name)
+        rows = self.iter_rows(path, sheet_name)
+        header = next(rows, [])
+        columns = [f"Unnamed: {i}" if pd.isna(v) else v for i, v in enumerate(header)]
+        records = [row[:len(columns)] for row in rows]
+        while records and all(pd.isna(v) for v in records[-1]):
+            records.pop()
+        return pd.DataFrame(records, columns=columns).infer_objects()
+
+    def read_tables(self, path, sheet_name, specs, **options):
+        """Extracts messy-table blocks from a sheet (see SheetIndex.extract_many).
+
+        Large workbooks are streamed and only the extracted rows are kept.
+        """
+        if self.should_stream(path):
+            return stream_messy_tables(self.iter_rows(path, sheet_name), specs, **options)
+        return SheetIndex(self.read(path, sheet_name, header=None)).extract_many(specs, **options)
+
+    def close(self):
+        for _, xls in self._handles.values():
+            xls.close()
+        self._handles.clear()
+        for book in self._stream_books.values():
+            book.close()
+        self._stream_books.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()